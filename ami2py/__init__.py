@@ -14,14 +14,30 @@ else:
     from .ami_database import AmiDataBase
     from .ami_reader import AmiReader
 
-from .ami_bitstructs import create_entry_chunk
 from .ami_dataclasses import (
     SymbolEntry,
     SymbolData,
-    Master,
+    ColumnarSymbolData,
     MasterData,
     MasterEntry,
-    SymbolConstruct,
 )
 from .consts import DATEPACKED, DAY, MONTH, YEAR, VOLUME, CLOSE, OPEN, HIGH, LOW
 
+# construct is only imported when one of its structures is used
+_LAZY_ATTRIBUTES = {
+    "create_entry_chunk": ".ami_bitstructs",
+    "Master": ".ami_construct",
+    "SymbolConstruct": ".ami_construct",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
@@ -0,0 +1,455 @@
+"""NumPy access to the quote records of AmiBroker symbol files.
+
+A symbol file consists of a 0x4A0 byte header followed by 40 byte records
+and a 4 byte terminator. Every record starts with the packed 64 bit date
+followed by eight little endian float32 values, so the whole record block
+can be mapped onto a structured array without decoding individual rows.
+
+numpy is an optional dependency and is imported on first use, the module
+attributes ``np`` and ``QUOTE_DTYPE`` are available once it is loaded.
+"""
+from collections import namedtuple
+from functools import reduce
+
+from .consts import (
+    DATEPACKED,
+    DAY,
+    MONTH,
+    YEAR,
+    HOUR,
+    MINUTE,
+    SECOND,
+    MILLI_SEC,
+    MICRO_SEC,
+    RESERVED,
+    FUT,
+    EPOCH_MICRO_SEC,
+    CLOSE,
+    OPEN,
+    HIGH,
+    LOW,
+    VOLUME,
+    AUX_1,
+    AUX_2,
+    TERMINATOR,
+    NUM_HEADER_BYTES,
+    OVERALL_ENTRY_BYTES,
+)
+
+from .ami_dates import date_to_packed, FLAG_BITS, TIME_BITS
+
+QUOTE_FIELDS = [
+    (DATEPACKED, "<u8"),
+    (CLOSE, "<f4"),
+    (OPEN, "<f4"),
+    (HIGH, "<f4"),
+    (LOW, "<f4"),
+    (VOLUME, "<f4"),
+    (AUX_1, "<f4"),
+    (AUX_2, "<f4"),
+    (TERMINATOR, "<f4"),
+]
+
+# name, bit offset and mask of the components of the packed date
+DATE_BITFIELDS = [
+    (YEAR, 52, 0xFFF),
+    (MONTH, 48, 0xF),
+    (DAY, 43, 0x1F),
+    (HOUR, 38, 0x1F),
+    (MINUTE, 32, 0x3F),
+    (SECOND, 26, 0x3F),
+    (MILLI_SEC, 16, 0x3FF),
+    (MICRO_SEC, 6, 0x3FF),
+    (RESERVED, 1, 0x1F),
+    (FUT, 0, 0x1),
+]
+
+
+def load_numpy():
+    """Import numpy and create :data:`QUOTE_DTYPE` on first use.
+
+    :return: the numpy module, None if numpy is not installed
+    """
+    global np, QUOTE_DTYPE
+    if "np" not in globals():
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - numpy is an optional dependency
+            return None
+        QUOTE_DTYPE = numpy.dtype(QUOTE_FIELDS)
+        np = numpy
+    return np
+
+
+def __getattr__(name):
+    if name in ("np", "QUOTE_DTYPE"):
+        load_numpy()
+        return globals().get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def require_numpy():
+    """Return the numpy module, raise ImportError if it is not installed."""
+    numpy = load_numpy()
+    if numpy is None:
+        raise ImportError("numpy is required for array access: pip install numpy")
+    return numpy
+
+
+def count_records(num_bytes, offset=NUM_HEADER_BYTES):
+    """Number of complete quote records in a buffer of ``num_bytes``.
+
+    The 4 byte terminator is shorter than a record, so files with and
+    without terminator are counted correctly.
+    """
+    return max(num_bytes - offset, 0) // OVERALL_ENTRY_BYTES
+
+
+def records_from_buffer(binary, offset=NUM_HEADER_BYTES):
+    """Return the quote records of ``binary`` as a structured array.
+
+    The result is a view created with ``np.frombuffer`` and therefore shares
+    memory with ``binary``. For ``bytes`` or read only ``mmap`` objects the
+    returned array is read only as well.
+
+    :param binary: content of a symbol file (or any buffer)
+    :param offset: position of the first record, 0 for buffers without header
+    :return: array with dtype :data:`QUOTE_DTYPE`
+    """
+    require_numpy()
+    num_records = count_records(len(binary), offset)
+    if num_records == 0:
+        return np.empty(0, dtype=QUOTE_DTYPE)
+    return np.frombuffer(binary, dtype=QUOTE_DTYPE, count=num_records, offset=offset)
+
+
+def decode_date_components(packed):
+    """Split a column of packed dates into one integer array per component.
+
+    :param packed: array like of packed 64 bit dates, e.g. ``records["DatePacked"]``
+    :return: dict mapping the consts names (``Year``, ``Month``, ...) to arrays
+    """
+    require_numpy()
+    packed = np.asarray(packed, dtype=np.uint64)
+    return {
+        name: ((packed >> np.uint64(shift)) & np.uint64(mask)).astype(np.int32)
+        for name, shift, mask in DATE_BITFIELDS
+    }
+
+
+def decode_dates(packed, components=False):
+    """Convert a column of packed dates into ``datetime64[us]`` values.
+
+    End of day bars (time fields set to the AmiBroker EOD marker) are mapped
+    to midnight of their day.
+
+    :param packed: array like of packed 64 bit dates
+    :param components: additionally return the dict of component arrays
+        created by :func:`decode_date_components`
+    :return: datetime64 array or tuple of datetime64 array and components
+    """
+    parts = decode_date_components(packed)
+    months = (parts[YEAR] - 1970) * 12 + parts[MONTH] - 1
+    days = months.astype("datetime64[M]").astype("datetime64[D]") + (parts[DAY] - 1)
+    micro_seconds = (
+        (parts[HOUR].astype(np.int64) * 60 + parts[MINUTE]) * 60 + parts[SECOND]
+    ) * 1000000 + parts[MILLI_SEC] * 1000 + parts[MICRO_SEC]
+    # end of day bars carry hour 31 and all other time bits set
+    micro_seconds[parts[HOUR] > 23] = 0
+    result = days.astype("datetime64[us]") + micro_seconds.astype("timedelta64[us]")
+    if components:
+        return result, parts
+    return result
+
+
+INTRADAY_COLUMNS = (HOUR, MINUTE, SECOND, MILLI_SEC, MICRO_SEC)
+INTRADAY_MODES = (False, True, "epoch")
+
+
+def date_columns(packed, intraday=False):
+    """Decode a column of packed dates into the date columns of ``to_dict``.
+
+    All components are decoded in one vectorized pass, see
+    :func:`decode_date_components`.
+
+    :param packed: array like of packed 64 bit dates
+    :param intraday: False for Day, Month and Year, True to add Hour,
+        Minute, Second, MilliSec and MicroSec, ``"epoch"`` to add a single
+        EpochMicroSec column of microseconds since 1970 (end of day bars at
+        midnight)
+    :return: dict mapping the column names to lists of ints
+    """
+    assert intraday in INTRADAY_MODES, f"intraday must be one of {INTRADAY_MODES}"
+    if intraday == "epoch":
+        dates, parts = decode_dates(packed, components=True)
+    else:
+        parts = decode_date_components(packed)
+    names = (DAY, MONTH, YEAR)
+    if intraday and intraday != "epoch":
+        names += INTRADAY_COLUMNS
+    result = {name: parts[name].tolist() for name in names}
+    if intraday == "epoch":
+        result[EPOCH_MICRO_SEC] = dates.astype(np.int64).tolist()
+    return result
+
+
+REQUIRED_COLUMNS = (YEAR, MONTH, DAY, CLOSE, OPEN, HIGH, LOW)
+DATE_COLUMNS = tuple(name for name, _, _ in DATE_BITFIELDS)
+VALUE_COLUMNS = tuple(name for name, _ in QUOTE_FIELDS[1:])
+
+
+def _check_column(name, values, length, strict):
+    values = np.asarray(values)
+    if values.ndim != 1:
+        raise ValueError(f"Column {name} must be one dimensional")
+    if length is not None and len(values) != length:
+        raise ValueError("All columns must have the same length")
+    kinds = "biu" if name in DATE_COLUMNS and strict else "biuf"
+    if len(values) > 0 and values.dtype.kind not in kinds:
+        raise TypeError(f"Column {name} has unsupported dtype {values.dtype}")
+    return values
+
+
+def encode_columns(columns, strict=True):
+    """Encode equally long columns into consecutive 40 byte records.
+
+    Every column is checked and converted once, the packed dates are
+    combined with vectorized shifts, so no per row objects are created.
+    The records are identical to those built by ``SymbolConstruct``.
+
+    :param columns: dict mapping the consts names (``Year``, ``Close``, ...)
+        to lists or arrays. Year, Month, Day, Close, Open, High and Low are
+        required, time components and the other values default to 0.
+    :param strict: reject unknown columns and float date components. Without
+        it unknown columns are ignored and float date components are
+        truncated like ``int()`` does.
+    :return: bytes of all records
+    """
+    require_numpy()
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    unknown = set(columns) - set(DATE_COLUMNS) - set(VALUE_COLUMNS)
+    if unknown and strict:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    length = None
+    arrays = {}
+    for name, values in columns.items():
+        if name in unknown:
+            continue
+        arrays[name] = _check_column(name, values, length, strict)
+        length = len(arrays[name])
+
+    records = np.zeros(length, dtype=QUOTE_DTYPE)
+    packed = records[DATEPACKED]
+    for name, shift, mask in DATE_BITFIELDS:
+        if name in arrays:
+            part = arrays[name].astype(np.int64).astype(np.uint64) & np.uint64(mask)
+            packed |= part << np.uint64(shift)
+    for name in VALUE_COLUMNS:
+        if name in arrays:
+            records[name] = arrays[name]
+    return records.tobytes()
+
+
+Panel = namedtuple("Panel", ["dates", "symbols", "values"])
+PANEL_JOINS = ("union", "intersect")
+PANEL_FILLS = (None, "ffill")
+# packed dates without the reserved and future flag bits
+DATE_KEY_MASK = 0xFFFFFFFFFFFFFFFF & ~FLAG_BITS
+
+
+def date_mask(packed, start=None, end=None):
+    """Boolean mask of the dates of ``packed`` between ``start`` and ``end``
+    (inclusive). Dates are given as for :meth:`AmiDataBase.get_range`."""
+    require_numpy()
+    packed = np.asarray(packed, dtype=np.uint64)
+    mask = np.ones(len(packed), dtype=bool)
+    if start is not None:
+        mask &= packed >= np.uint64(date_to_packed(start))
+    if end is not None:
+        mask &= packed <= np.uint64(date_to_packed(end, end=True))
+    return mask
+
+
+def _last_of_equal(keys):
+    """Mask selecting the last element of every run of equal sorted keys."""
+    keep = np.ones(len(keys), dtype=bool)
+    keep[:-1] = keys[1:] != keys[:-1]
+    return keep
+
+
+def forward_fill(values):
+    """Replace NaN values of a 2D array by the last valid value above them."""
+    require_numpy()
+    rows = np.arange(len(values))[:, None]
+    index = np.where(np.isnan(values), 0, rows)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return np.take_along_axis(values, index, axis=0)
+
+
+def align_columns(date_columns, value_columns, how="union", fill=None):
+    """Align the value columns of several symbols on their dates.
+
+    The sorted date columns are merged into the union or intersection of
+    their dates and every column is placed by binary search, no per date
+    lookups are done. Columns are usually sorted already, as in symbol
+    files, others are sorted first. The reserved and future flag bits are
+    ignored when comparing dates, of several quotes with the same date the
+    last one is used.
+
+    :param date_columns: list of packed date arrays
+    :param value_columns: list of value arrays, one per date column
+    :param how: ``"union"`` or ``"intersect"`` of the dates
+    :param fill: None leaves missing values NaN, ``"ffill"`` repeats the
+        last value of the column
+    :return: tuple of the merged packed dates (flag bits cleared) and a
+        float32 array with one row per date and one column per date column
+    """
+    require_numpy()
+    assert how in PANEL_JOINS, f"how must be one of {PANEL_JOINS}"
+    assert fill in PANEL_FILLS, f"fill must be one of {PANEL_FILLS}"
+    keys = []
+    values = []
+    for dates, column in zip(date_columns, value_columns):
+        key = np.asarray(dates, dtype=np.uint64) & np.uint64(DATE_KEY_MASK)
+        column = np.asarray(column, dtype=np.float32)
+        if np.any(key[1:] < key[:-1]):
+            order = np.argsort(key, kind="stable")
+            key = key[order]
+            column = column[order]
+        keep = _last_of_equal(key)
+        keys.append(key[keep])
+        values.append(column[keep])
+
+    if not keys:
+        merged = np.empty(0, dtype=np.uint64)
+    elif how == "union":
+        merged = np.unique(np.concatenate(keys))
+    else:
+        merged = reduce(
+            lambda left, right: np.intersect1d(left, right, assume_unique=True), keys
+        )
+
+    result = np.full((len(merged), len(keys)), np.nan, dtype=np.float32)
+    for column, (key, value) in enumerate(zip(keys, values)):
+        if how == "union":
+            result[np.searchsorted(merged, key), column] = value
+        else:
+            result[:, column] = value[np.searchsorted(key, merged)]
+    if fill == "ffill" and len(merged):
+        result = forward_fill(result)
+    return merged, result
+
+
+# unit of the resample rules and whether the bars are end of day bars
+RESAMPLE_UNITS = {"min": False, "h": False, "D": True, "W": True, "M": True}
+# hour 31 and all other time bits set, the AmiBroker end of day marker
+EOD_TIME_BITS = TIME_BITS & ~FLAG_BITS
+MICRO_SECONDS = {"min": 60 * 1000000, "h": 3600 * 1000000}
+
+
+def parse_rule(rule):
+    """Split a resample rule like ``"5min"``, ``"1h"``, ``"D"``, ``"W"`` or
+    ``"M"`` into the multiple and the unit."""
+    import re
+
+    match = re.fullmatch(r"(\d*)\s*(min|h|D|W|M)", str(rule))
+    if match is None:
+        raise ValueError(
+            f"Unsupported rule {rule!r}, use e.g. '5min', '1h', 'D', 'W' or 'M'"
+        )
+    multiple = int(match.group(1) or 1)
+    unit = match.group(2)
+    if multiple < 1 or (RESAMPLE_UNITS[unit] and multiple != 1):
+        raise ValueError(f"Unsupported multiple in rule {rule!r}")
+    return multiple, unit
+
+
+def encode_dates(dates):
+    """Convert ``datetime64`` values into packed dates, the inverse of
+    :func:`decode_dates` for intraday dates."""
+    require_numpy()
+    dates = np.asarray(dates, dtype="datetime64[us]")
+    years = dates.astype("datetime64[Y]")
+    months = dates.astype("datetime64[M]")
+    days = dates.astype("datetime64[D]")
+    micro_seconds = (dates - days).astype(np.int64)
+    seconds = micro_seconds // 1000000
+    parts = {
+        YEAR: years.astype(np.int64) + 1970,
+        MONTH: (months - years).astype(np.int64) + 1,
+        DAY: (days - months.astype("datetime64[D]")).astype(np.int64) + 1,
+        HOUR: seconds // 3600,
+        MINUTE: seconds // 60 % 60,
+        SECOND: seconds % 60,
+        MILLI_SEC: micro_seconds // 1000 % 1000,
+        MICRO_SEC: micro_seconds % 1000,
+    }
+    packed = np.zeros(len(dates), dtype=np.uint64)
+    for name, shift, mask in DATE_BITFIELDS:
+        if name in parts:
+            part = parts[name].astype(np.uint64) & np.uint64(mask)
+            packed |= part << np.uint64(shift)
+    return packed
+
+
+def _bucket_keys(dates, multiple, unit):
+    if unit in MICRO_SECONDS:
+        return dates.astype(np.int64) // (multiple * MICRO_SECONDS[unit])
+    if unit == "D":
+        return dates.astype("datetime64[D]").astype(np.int64)
+    if unit == "W":
+        # weeks start on monday, 1970-01-01 was a thursday
+        return (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    return dates.astype("datetime64[M]").astype(np.int64)
+
+
+def resample_records(records, rule):
+    """Aggregate quote records into bars of a coarser granularity.
+
+    The bars are built by a segmented reduction over runs of equal bucket
+    keys computed from the decoded dates: the first Open, the highest High,
+    the lowest Low, the last Close and the summed Volume of every bucket,
+    AUX1 and AUX2 are taken from the last quote. Records which are not
+    sorted by date are sorted first, keeping the order of equal dates.
+
+    :param records: array with dtype :data:`QUOTE_DTYPE`
+    :param rule: ``"<n>min"`` or ``"<n>h"`` for intraday bars dated at the
+        start of their bucket, ``"D"``, ``"W"`` (weeks starting on monday)
+        or ``"M"`` for end of day bars dated at the last quote of their
+        bucket
+    :return: array with dtype :data:`QUOTE_DTYPE`, one record per bar
+    """
+    require_numpy()
+    multiple, unit = parse_rule(rule)
+    packed = np.asarray(records[DATEPACKED], dtype=np.uint64)
+    sort_keys = packed & np.uint64(DATE_KEY_MASK)
+    if np.any(sort_keys[1:] < sort_keys[:-1]):
+        order = np.argsort(sort_keys, kind="stable")
+        records = records[order]
+        packed = packed[order]
+    if len(records) == 0:
+        return np.zeros(0, dtype=QUOTE_DTYPE)
+
+    keys = _bucket_keys(decode_dates(packed), multiple, unit)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    result = np.zeros(len(starts), dtype=QUOTE_DTYPE)
+    if RESAMPLE_UNITS[unit]:
+        day_bits = packed[ends] & ~np.uint64(TIME_BITS)
+        result[DATEPACKED] = day_bits | np.uint64(EOD_TIME_BITS)
+    else:
+        width = multiple * MICRO_SECONDS[unit]
+        result[DATEPACKED] = encode_dates(
+            (keys[starts] * width).astype("datetime64[us]")
+        )
+    result[OPEN] = records[OPEN][starts]
+    result[HIGH] = np.maximum.reduceat(records[HIGH], starts)
+    result[LOW] = np.minimum.reduceat(records[LOW], starts)
+    result[CLOSE] = records[CLOSE][ends]
+    result[VOLUME] = np.add.reduceat(records[VOLUME].astype(np.float64), starts)
+    result[AUX_1] = records[AUX_1][ends]
+    result[AUX_2] = records[AUX_2][ends]
+    return result
@@ -0,0 +1,177 @@
+"""Streaming export of a database into Apache Arrow record batches and Parquet.
+
+The quotes of every symbol are read in chunks of memory mapped records (see
+:meth:`ami2py.AmiReader.iter_chunks`) and converted column wise into record
+batches with the symbol as a column. Symbols are converted by a pool of
+worker threads while the batches are written. Every worker hands its batches
+one at a time through a bounded queue, so the memory in use depends on the
+number of workers and the chunk size, not on the size of the symbols or the
+database. pyarrow is an optional dependency and is only imported when one of
+the functions is called.
+"""
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .ami_arrays import decode_dates, require_numpy, np
+from .consts import DATEPACKED, OPEN, HIGH, LOW, CLOSE, VOLUME, AUX_1, AUX_2
+
+SYMBOL_COLUMN = "Symbol"
+DATE_COLUMN = "Date"
+YEAR_COLUMN = "year"
+VALUE_COLUMNS = (OPEN, HIGH, LOW, CLOSE, VOLUME, AUX_1, AUX_2)
+PARTITIONS = (None, "year")
+# record batches a worker converts ahead of the consumer
+QUEUED_BATCHES = 1
+# seconds between checks whether the consumer stopped
+PUT_TIMEOUT = 0.1
+_DONE = object()
+
+
+def require_pyarrow():
+    require_numpy()
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow export: pip install pyarrow")
+    return pyarrow
+
+
+def quote_schema(partition_by=None):
+    """Arrow schema of the exported record batches."""
+    pa = require_pyarrow()
+    fields = [
+        (SYMBOL_COLUMN, pa.string()),
+        (DATE_COLUMN, pa.timestamp("us")),
+    ]
+    fields += [(name, pa.float32()) for name in VALUE_COLUMNS]
+    if partition_by == "year":
+        fields.append((YEAR_COLUMN, pa.int16()))
+    return pa.schema(fields)
+
+
+def records_to_batch(symbol, records, schema):
+    """Convert a structured array of quote records into a record batch.
+
+    :param records: array with dtype :data:`ami2py.ami_arrays.QUOTE_DTYPE`
+    :param schema: schema created by :func:`quote_schema`
+    """
+    pa = require_pyarrow()
+    dates = decode_dates(records[DATEPACKED])
+    columns = {
+        SYMBOL_COLUMN: pa.array([symbol] * len(records), pa.string()),
+        DATE_COLUMN: dates,
+    }
+    for name in VALUE_COLUMNS:
+        # copy, the records are a view onto a memory map
+        columns[name] = np.array(records[name])
+    if YEAR_COLUMN in schema.names:
+        columns[YEAR_COLUMN] = dates.astype("datetime64[Y]").astype(np.int16) + 1970
+    return pa.record_batch([columns[name] for name in schema.names], schema=schema)
+
+
+def _put(batches, item, stop):
+    """Put ``item`` into the queue unless the consumer stopped."""
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _convert_symbol(reader, symbol, chunk_size, schema, batches, stop):
+    """Put the record batches of ``symbol`` into ``batches``, followed by
+    a marker once all chunks are converted."""
+    try:
+        for chunk in reader.iter_chunks(symbol, chunk_size, kind="array"):
+            if not _put(batches, records_to_batch(symbol, chunk, schema), stop):
+                return
+    finally:
+        _put(batches, _DONE, stop)
+
+
+def _drain(future, batches):
+    while True:
+        batch = batches.get()
+        if batch is _DONE:
+            break
+        yield batch
+    # raise the exception of the worker, if any
+    future.result()
+
+
+def iter_record_batches(reader, symbols, chunk_size, partition_by=None, workers=None):
+    """Stream the quotes of ``symbols`` as Arrow record batches.
+
+    Symbols are converted by a thread pool. Each running worker converts at
+    most one batch ahead of the consumer, at most twice as many symbols as
+    there are workers are scheduled. The batches are returned in the order
+    of ``symbols``.
+
+    :param reader: :class:`ami2py.AmiReader` of the database
+    :param chunk_size: maximum number of quotes per batch
+    :param partition_by: None or ``"year"`` to add a year column
+    :param workers: number of threads, defaults to 4
+    """
+    assert partition_by in PARTITIONS, f"partition_by must be one of {PARTITIONS}"
+    schema = quote_schema(partition_by)
+    workers = workers or 4
+    stop = threading.Event()
+    pending = deque()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for symbol in symbols:
+            if len(pending) >= 2 * workers:
+                yield from _drain(*pending.popleft())
+            batches = queue.Queue(maxsize=QUEUED_BATCHES)
+            future = pool.submit(
+                _convert_symbol, reader, symbol, chunk_size, schema, batches, stop
+            )
+            pending.append((future, batches))
+        while pending:
+            yield from _drain(*pending.popleft())
+    finally:
+        # let blocked workers return if the consumer stopped early
+        stop.set()
+        pool.shutdown(wait=True)
+
+
+def export_parquet(
+    reader,
+    path,
+    symbols,
+    chunk_size,
+    partition_by=None,
+    workers=None,
+    **write_options,
+):
+    """Write the quotes of ``symbols`` as a Parquet dataset into ``path``.
+
+    :param partition_by: None or ``"year"`` for hive style ``year=...``
+        folders
+    :param write_options: passed on to ``pyarrow.dataset.write_dataset``,
+        e.g. ``existing_data_behavior`` or ``max_rows_per_file``
+    """
+    pa = require_pyarrow()
+    import pyarrow.dataset as ds
+
+    schema = quote_schema(partition_by)
+    partitioning = None
+    if partition_by == "year":
+        partitioning = ds.partitioning(
+            pa.schema([schema.field(YEAR_COLUMN)]), flavor="hive"
+        )
+    # keep the quotes of a symbol in the order of the symbol file
+    write_options.setdefault("preserve_order", True)
+    batches = iter_record_batches(reader, symbols, chunk_size, partition_by, workers)
+    ds.write_dataset(
+        batches,
+        str(path),
+        schema=schema,
+        format="parquet",
+        partitioning=partitioning,
+        **write_options,
+    )
@@ -33,14 +33,16 @@ DateShort=BitsSwapped(BitStruct(
     YEAR / RevBitsInteger(length=12),
 ))
 
+# the swapped bit stream starts with the lowest bit of the packed date, so
+# every field spanning several bits has to be read reversed
 Date=BitStruct(
     FUT / BitsInteger(length=1),  # 1
-    RESERVED / BitsInteger(length=5),  # 6
-    MICRO_SEC / BitsInteger(length=10),  # Bit 16 byte 2
-    MILLI_SEC / BitsInteger(length=10),  # 26
-    SECOND / BitsInteger(length=6),  # Bit 32 Byte 4
-    MINUTE / BitsInteger(length=6),  # 38
-    HOUR / BitsInteger(length=5),  # 43
+    RESERVED / RevBitsInteger(length=5),  # 6
+    MICRO_SEC / RevBitsInteger(length=10),  # Bit 16 byte 2
+    MILLI_SEC / RevBitsInteger(length=10),  # 26
+    SECOND / RevBitsInteger(length=6),  # Bit 32 Byte 4
+    MINUTE / RevBitsInteger(length=6),  # 38
+    HOUR / RevBitsInteger(length=5),  # 43
     DAY / RevBitsInteger(length=5),  # Bit 48 Byte 6
     MONTH / RevBitsInteger(length=4),  # 52
     YEAR / RevBitsInteger(length=12),  # Bit  64 Byte 8
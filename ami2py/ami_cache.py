@@ -0,0 +1,164 @@
+"""Memory bounded LRU cache for loaded symbol data."""
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import sys
+import weakref
+
+from .consts import NUM_HEADER_BYTES
+
+# approximate memory of one SymbolEntry instance with its float values
+SYMBOL_ENTRY_BYTES = 360
+
+
+def estimate_size(value):
+    """Approximate number of bytes held by a cached symbol."""
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    binentries = getattr(value, "binentries", None)
+    if binentries is not None:
+        return NUM_HEADER_BYTES + len(binentries)
+    entries = getattr(value, "Entries", None)
+    if entries is not None:
+        return NUM_HEADER_BYTES + len(entries) * SYMBOL_ENTRY_BYTES
+    return sys.getsizeof(value)
+
+
+def _has_modified_flag(key, value):
+    return getattr(value, "modified", False)
+
+
+class SymbolCache(MutableMapping):
+    """Mapping of symbol names to loaded data with a byte budget.
+
+    When the estimated size of all entries exceeds ``max_bytes`` the least
+    recently used entries are evicted. Pinned entries and modified entries
+    are never evicted. By default an entry is modified if its ``modified``
+    attribute is set (facades with pending appends), ``is_modified`` can be
+    given as a function of key and value instead.
+    Lookups through ``[]`` and :meth:`get` count as hits or misses, ``in``
+    and iteration neither count nor change the LRU order.
+
+    Evicted entries are remembered by weak reference. An entry which is
+    still referenced elsewhere, e.g. a facade held by the caller, is put
+    back on its next lookup instead of being loaded again, and
+    :meth:`restore_modified` puts back those changed after their eviction.
+    """
+
+    def __init__(self, max_bytes=None, is_modified=None):
+        self.max_bytes = max_bytes
+        self._is_modified = is_modified or _has_modified_flag
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._pinned = set()
+        self._evicted = weakref.WeakValueDictionary()
+
+    def __getitem__(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            if not self._restore(key):
+                self.misses += 1
+                raise
+            value = self._data[key]
+        self.hits += 1
+        self._data.move_to_end(key)
+        # appends may have grown the entry since it was stored
+        self._set_size(key, estimate_size(value))
+        self._evict(keep=key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._evicted.pop(key, None)
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._set_size(key, estimate_size(value))
+        self._evict(keep=key)
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self.nbytes -= self._sizes.pop(key)
+        self._pinned.discard(key)
+
+    def __contains__(self, key):
+        return key in self._data or self._restore(key)
+
+    def __iter__(self):
+        return iter(list(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def peek(self, key, default=None):
+        """Value of ``key`` without counting a hit or changing the LRU order."""
+        if key not in self:
+            return default
+        return self._data[key]
+
+    def restore_modified(self):
+        """Put back evicted entries which were modified since."""
+        for key, value in list(self._evicted.items()):
+            if self._is_modified(key, value):
+                self._restore(key)
+
+    def _restore(self, key):
+        value = self._evicted.get(key)
+        if value is None:
+            return False
+        self[key] = value
+        return True
+
+    def items(self):
+        return list(self._data.items())
+
+    def values(self):
+        return list(self._data.values())
+
+    def pin(self, key):
+        """Protect ``key`` from eviction until :meth:`unpin` is called."""
+        self._pinned.add(key)
+
+    def unpin(self, key):
+        self._pinned.discard(key)
+        self._evict()
+
+    def is_pinned(self, key):
+        return key in self._pinned or self._is_modified(key, self._data[key])
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _set_size(self, key, size):
+        self.nbytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+    def _evict(self, keep=None):
+        if self.max_bytes is None:
+            return
+        excess = self.nbytes - self.max_bytes
+        evicted = []
+        for key in self._data:
+            if excess <= 0:
+                break
+            if key == keep or self.is_pinned(key):
+                continue
+            evicted.append(key)
+            excess -= self._sizes[key]
+        for key in evicted:
+            try:
+                self._evicted[key] = self._data[key]
+            except TypeError:
+                pass  # no weak references to slotted dataclasses
+            del self[key]
+            self.evictions += 1
@@ -0,0 +1,169 @@
+"""Catalog of symbol metadata stored next to the database.
+
+The catalog is a JSON file in the database folder which records per symbol
+the file size and modification time, the number of bars, the packed dates
+of the first and last bar and a few header fields. Entries are validated
+with ``os.stat``, an entry whose file changed since it was recorded is read
+again from the first and last record of the file. This answers metadata
+queries for large databases without opening every symbol file.
+"""
+import json
+import os
+import struct
+
+from .ami_database_folder_layout import AmiDbFolderLayout
+from .ami_dates import packed_to_datetime
+from .consts import NUM_HEADER_BYTES, OVERALL_ENTRY_BYTES, HEADER_LENGTH_OFFSET
+
+CATALOG_FILE = "ami2py.catalog.json"
+CATALOG_VERSION = 1
+MASTER_FILE = "broker.master"
+
+# (name, offset, size) of the string fields of the symbol header
+HEADER_STRINGS = (("SymbolName", 8, 144), ("FullName", 152, 348))
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_catalog_entry(path):
+    """Create the catalog entry of the symbol file ``path``.
+
+    Only the header and the first and last record are read.
+    """
+    size, mtime_ns = _stat_key(path)
+    with open(path, "rb") as f:
+        header = f.read(NUM_HEADER_BYTES)
+        bars = max(size - NUM_HEADER_BYTES, 0) // OVERALL_ENTRY_BYTES
+        first = last = None
+        if bars:
+            first = struct.unpack("<Q", f.read(8))[0]
+            f.seek(NUM_HEADER_BYTES + (bars - 1) * OVERALL_ENTRY_BYTES)
+            last = struct.unpack("<Q", f.read(8))[0]
+    fields = {}
+    for name, start, length in HEADER_STRINGS:
+        value = header[start : start + length].split(b"\0", 1)[0]
+        fields[name] = value.decode("ascii", "replace")
+    if len(header) == NUM_HEADER_BYTES:
+        fields["Length"] = struct.unpack_from("<I", header, HEADER_LENGTH_OFFSET)[0]
+    return {
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "bars": bars,
+        "first": first,
+        "last": last,
+        "header": fields,
+    }
+
+
+class AmiCatalog(AmiDbFolderLayout):
+    """Symbol metadata of the database in ``folder``.
+
+    Call :meth:`save` to store changes, :class:`ami2py.AmiDataBase` does so
+    in ``write_database``.
+    """
+
+    def __init__(self, folder):
+        self.folder = os.fspath(folder)
+        self.path = os.path.join(self.folder, CATALOG_FILE)
+        self.modified = False
+        self._symbols = {}
+        self._master = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                content = json.loads(f.read())
+        except (OSError, ValueError):
+            return
+        if content.get("version") != CATALOG_VERSION:
+            return
+        self._symbols = content.get("symbols", {})
+        self._master = content.get("master")
+
+    def save(self):
+        """Store the catalog atomically if it changed."""
+        if not self.modified:
+            return
+        content = {
+            "version": CATALOG_VERSION,
+            "master": self._master,
+            "symbols": self._symbols,
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(content, f, separators=(",", ":"))
+        os.replace(temp_path, self.path)
+        self.modified = False
+
+    def get_symbols(self):
+        """Symbols of the master file, None if the master file changed since
+        it was recorded with :meth:`set_symbols`."""
+        if self._master is None:
+            return None
+        try:
+            key = list(_stat_key(os.path.join(self.folder, MASTER_FILE)))
+        except OSError:
+            return None
+        if key != self._master["stat"]:
+            return None
+        return list(self._master["symbols"])
+
+    def set_symbols(self, symbols):
+        """Record the symbols of the current master file."""
+        path = os.path.join(self.folder, MASTER_FILE)
+        if not os.path.isfile(path):
+            return
+        self._master = {"stat": list(_stat_key(path)), "symbols": list(symbols)}
+        self.modified = True
+
+    def entry(self, symbol):
+        """Up to date catalog entry of ``symbol``.
+
+        The entry is read from the symbol file if it is missing or stale.
+
+        :return: dict with ``path``, ``size``, ``mtime_ns``, ``bars``,
+            ``first`` and ``last`` (packed dates, None without bars) and
+            ``header``, None if the symbol file does not exist
+        """
+        path = self._get_symbol_path(self.folder, symbol)
+        try:
+            key = _stat_key(path)
+        except OSError:
+            if self._symbols.pop(symbol, None) is not None:
+                self.modified = True
+            return None
+        entry = self._symbols.get(symbol)
+        if entry is None or (entry["size"], entry["mtime_ns"]) != key:
+            entry = self.refresh(symbol)
+        return entry
+
+    def refresh(self, symbol):
+        """Read the entry of ``symbol`` from its file, e.g. after writing it."""
+        path = self._get_symbol_path(self.folder, symbol)
+        if not os.path.isfile(path):
+            if self._symbols.pop(symbol, None) is not None:
+                self.modified = True
+            return None
+        entry = read_catalog_entry(path)
+        entry["path"] = os.path.relpath(path, self.folder)
+        self._symbols[symbol] = entry
+        self.modified = True
+        return entry
+
+    def last_timestamp(self, symbol):
+        """Date of the last bar of ``symbol`` or None."""
+        entry = self.entry(symbol)
+        if entry is None or entry["last"] is None:
+            return None
+        return packed_to_datetime(entry["last"])
+
+    def first_timestamp(self, symbol):
+        """Date of the first bar of ``symbol`` or None."""
+        entry = self.entry(symbol)
+        if entry is None or entry["first"] is None:
+            return None
+        return packed_to_datetime(entry["first"])
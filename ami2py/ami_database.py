@@ -1,10 +1,59 @@
-from .ami_reader import AmiReader
-from .ami_dataclasses import SymbolEntry, SymbolData
-from .ami_construct import Master, SymbolConstruct
+from .ami_reader import AmiReader, DEFAULT_CHUNK_RECORDS
+from .ami_dataclasses import SymbolEntry, encode_entries
 from pathlib import Path
+import functools
 import os
+import struct
 
 from .ami_database_folder_layout import AmiDbFolderLayout
+from .consts import (
+    CLOSE,
+    DATEPACKED,
+    NUM_HEADER_BYTES,
+    OVERALL_ENTRY_BYTES,
+    TERMINATOR_DOUBLE_WORD_LENGTH,
+)
+from .ami_journal import AmiWriteBatch, recover_journal
+from .ami_cache import SymbolCache
+from .ami_catalog import AmiCatalog
+from .ami_arrays import (
+    encode_columns,
+    align_columns,
+    decode_dates,
+    date_mask,
+    resample_records,
+    Panel,
+    VALUE_COLUMNS,
+)
+from .ami_dates import packed_to_datetime
+from .ami_symbol_facade import read_entries
+
+WRITE_MODE_REWRITE = "rewrite"
+WRITE_MODE_APPEND = "append"
+
+# AmiReader methods used by load_symbols
+SYMBOL_LOADERS = {
+    "fast": "get_fast_symbol_data",
+    "data": "get_symbol_data",
+    "dict": "get_symbol_data_dictionary",
+    "array": "get_symbol_array",
+}
+
+_worker_reader = None
+
+
+def _init_load_worker(folder, use_compiled, use_construct, columnar):
+    global _worker_reader
+    _worker_reader = AmiReader(
+        folder,
+        use_compiled=use_compiled,
+        use_construct=use_construct,
+        columnar=columnar,
+    )
+
+
+def _load_in_worker(loader, symbol_name):
+    return getattr(_worker_reader, loader)(symbol_name)
 
 
 def symbolpath(root, symbol):
@@ -12,27 +61,97 @@ def symbolpath(root, symbol):
 
 
 class AmiDataBase(AmiDbFolderLayout):
-    def __init__(self, folder, use_compiled=False, avoid_windows_file=True):
+    def __init__(
+        self,
+        folder,
+        use_compiled=False,
+        avoid_windows_file=True,
+        write_mode=WRITE_MODE_REWRITE,
+        atomic_writes=False,
+        cache_bytes=None,
+        use_construct=False,
+        columnar=False,
+        readonly_facades=False,
+        catalog=False,
+    ):
+        """
+        :param folder: database folder, created if it does not exist
+        :param use_compiled: use compiled construct structures
+        :param avoid_windows_file: rename symbols clashing with reserved
+            windows file names in :meth:`add_new_symbol`
+        :param write_mode: ``"rewrite"`` writes complete symbol files,
+            ``"append"`` only writes the quotes appended to existing files
+        :param atomic_writes: write files through temporary files and a
+            journal so that an interrupted write can be completed or rolled
+            back the next time the database is opened
+        :param cache_bytes: memory budget of each of the symbol caches, least
+            recently used symbols without pending changes are evicted when it
+            is exceeded. None keeps every loaded symbol.
+        :param use_construct: read symbol files with construct instead of the
+            struct based decoder
+        :param columnar: keep symbol data as :class:`ColumnarSymbolData`,
+            which needs about 40 bytes per bar
+        :param readonly_facades: keep symbol files memory mapped and serve the
+            fast symbol data read only from the mapping. Symbols are copied
+            when quotes are appended to them.
+        :param catalog: keep symbol metadata in a catalog file in the
+            database folder, see :mod:`ami2py.ami_catalog`. The symbol list
+            and the last timestamps are then served from the catalog.
+        """
+        assert write_mode in (WRITE_MODE_REWRITE, WRITE_MODE_APPEND)
         if not os.path.exists(folder):
             os.mkdir(folder)
+        recover_journal(folder)
         self.avoid_windows_file = avoid_windows_file
-        self.reader = AmiReader(folder, use_compiled=use_compiled)
-        self._symbol_cache = {}
-        self._fast_symbol_cache = {}
+        self.write_mode = write_mode
+        self.atomic_writes = atomic_writes
+        self.reader = AmiReader(
+            folder,
+            use_compiled=use_compiled,
+            use_construct=use_construct,
+            columnar=columnar,
+            readonly_facades=readonly_facades,
+        )
+        self._use_compiled = use_compiled
+        self._use_construct = use_construct
+        self._columnar = columnar
+        self._symbol_cache = SymbolCache(
+            cache_bytes, is_modified=self._symbol_data_changed
+        )
+        self._fast_symbol_cache = SymbolCache(cache_bytes)
         self._symbols = []
         self._symbol_frames = {}
-        self._modified_symbols = []
-        self._master = self.reader.get_master()
+        # symbols of the dataclass cache changed since the last write, the
+        # fast symbol cache tracks this on the facades themselves
+        self._modified_symbols = set()
+        # number of entries of the dataclass symbols as read or last written,
+        # catches quotes appended directly to data from get_symbol_data
+        self._stored_counts = {}
+        self._master_modified = False
         self.folder = folder
         self._master_path = os.path.join(folder, "broker.master")
+        self.catalog = AmiCatalog(folder) if catalog else None
+
+    @property
+    def _master(self):
+        # broker.master is parsed by the reader on first use
+        return self.reader.get_master()
 
     def get_symbols(self):
         if len(self._symbols) == 0:
-            self._symbols = self.reader.get_symbols()
+            symbols = None
+            if self.catalog is not None:
+                symbols = self.catalog.get_symbols()
+            if symbols is None:
+                symbols = self.reader.get_symbols()
+                if self.catalog is not None:
+                    self.catalog.set_symbols(symbols)
+            self._symbols = symbols
         return self._symbols
 
     def add_symbol(self, symbol_name):
-        self._master.append_symbol(symbol=symbol_name)
+        if self._master.append_symbol(symbol=symbol_name):
+            self._master_modified = True
 
     def add_new_symbol(self, symbol_name, symboldata=None):
         if self.avoid_windows_file:
@@ -49,22 +168,87 @@ class AmiDataBase(AmiDbFolderLayout):
         return result
 
     def _add_new_symbol(self, symbol_name, symboldata=None):
-        self._master.append_symbol(symbol=symbol_name)
+        if self._master.append_symbol(symbol=symbol_name):
+            self._master_modified = True
         self.read_fast_data_for_symbol(symbol_name)
-        if isinstance(symboldata, dict):
-            self._fast_symbol_cache[symbol_name] += symboldata
-        if isinstance(symboldata, list):
-            for el in symboldata:
-                self._fast_symbol_cache[symbol_name] += el
+        facade = self._writable_fast_symbol_data(symbol_name)
+        # new symbols are written even if no quotes were added yet
+        facade.modified = True
+        if symboldata is not None:
+            facade.extend(symboldata)
+
+    def _writable_fast_symbol_data(self, symbol_name):
+        """Fast symbol data of ``symbol_name`` which can be appended to,
+        read only facades are replaced by a copy and their file is unmapped,
+        so that it can be replaced by :meth:`write_database`."""
+        facade = self.get_fast_symbol_data(symbol_name)
+        if facade.readonly:
+            mapped, facade = facade, facade.to_writable()
+            mapped.close()
+            self._fast_symbol_cache[symbol_name] = facade
+        return facade
+
+    def _release_readonly_facade(self, symbol_name):
+        """Unmap the file of a cached read only facade before it is replaced."""
+        facade = self._fast_symbol_cache.peek(symbol_name)
+        if facade is not None and facade.readonly:
+            facade.close()
+            del self._fast_symbol_cache[symbol_name]
 
     def append_to_symbol(self, symbol_name, symboldata):
-        if symbol_name not in self._fast_symbol_cache:
-            self.read_fast_data_for_symbol(symbol_name)
-        if type(symboldata) == dict:
-            self._fast_symbol_cache[symbol_name] += symboldata
-        if type(symboldata) == list:
-            for el in symboldata:
-                self._fast_symbol_cache[symbol_name] += el
+        """Append quotes to the fast symbol data of ``symbol_name``.
+
+        :param symboldata: a quote dictionary, a list of quote dictionaries,
+            a dictionary of columns or a NumPy structured array, see
+            :meth:`AmiSymbolDataFacade.extend`
+        """
+        self._writable_fast_symbol_data(symbol_name).extend(symboldata)
+
+    def append_columns(self, symbol_name, **columns):
+        """Append quotes given as columns to the fast symbol data.
+
+        The columns are validated once and encoded into records in one
+        vectorized pass, see :func:`ami2py.ami_arrays.encode_columns`.
+        Requires numpy.
+
+        Example: ``db.append_columns("SPCE", Year=years, Month=months,
+        Day=days, Open=opens, High=highs, Low=lows, Close=closes)``
+        """
+        records = encode_columns(columns)
+        self._writable_fast_symbol_data(symbol_name).extend_records(records)
+
+    def to_pandas(self, symbol_name, columns=None):
+        """Quotes of ``symbol_name`` as pandas DataFrame with a DatetimeIndex.
+
+        Appended quotes of the fast symbol cache are included, see
+        :meth:`get_symbol_array`. Requires numpy and pandas.
+
+        :param columns: value columns, defaults to Open, High, Low, Close,
+            Volume, AUX1 and AUX2
+        """
+        from .ami_pandas import records_to_frame, FRAME_COLUMNS
+
+        records = self.get_symbol_array(symbol_name)
+        return records_to_frame(records, columns or FRAME_COLUMNS)
+
+    def from_pandas(self, symbol_name, frame, eod=None):
+        """Append the rows of a DataFrame to ``symbol_name``.
+
+        The dates are taken from the index, the values from the Open, High,
+        Low, Close, Volume, AUX1 and AUX2 columns, see
+        :func:`ami2py.ami_pandas.frame_to_columns`. The rows are encoded in
+        one vectorized pass like :meth:`append_columns`. Symbols not in the
+        master file yet are added.
+
+        :param eod: store end of day quotes, by default if all dates of the
+            index are at midnight, as for frames created by :meth:`to_pandas`
+            from end of day data
+        """
+        from .ami_pandas import frame_to_columns
+
+        columns = frame_to_columns(frame, eod)
+        self.add_symbol(symbol_name)
+        self.append_columns(symbol_name, **columns)
 
     def add_symbol_data_dict(self, input_dict):
         """Append data provided as dictionaries to the fast symbol cache.
@@ -80,30 +264,11 @@ class AmiDataBase(AmiDbFolderLayout):
         assert isinstance(input_dict, dict)
 
         for symbol, data in input_dict.items():
-            if symbol not in self._fast_symbol_cache:
-                self.read_fast_data_for_symbol(symbol)
-
-            # data may be a list of dictionaries
-            if isinstance(data, list):
-                for entry in data:
-                    self._fast_symbol_cache[symbol] += entry
-                continue
-
-            # or a dictionary with column lists
-            if isinstance(data, dict):
-                if all(isinstance(v, list) for v in data.values()):
-                    if len(data) > 0:
-                        length = len(next(iter(data.values())))
-                        for i in range(length):
-                            entry = {k: v[i] for k, v in data.items()}
-                            self._fast_symbol_cache[symbol] += entry
-                else:
-                    self._fast_symbol_cache[symbol] += data
+            self.append_to_symbol(symbol, data)
 
     def store_symbol(self, symbol_name):
         if symbol_name in self._symbol_cache:
-            data = self._symbol_cache[symbol_name].to_construct_dict()
-            newbin = SymbolConstruct.build(data)
+            newbin = self._symbol_cache[symbol_name].to_binary()
             with open(os.path.join(self.folder, symbol_name), "wb") as f:
                 f.write(newbin)
 
@@ -111,50 +276,491 @@ class AmiDataBase(AmiDbFolderLayout):
         symb_root = self.get_symbol_root_folder(symbol)
         Path(os.path.join(self.folder, symb_root)).mkdir(parents=True, exist_ok=True)
 
-    def write_database(self):
-        con_data = self._master.to_construct_dict()
-        newbin = Master.build(con_data)
-        with open(self._master_path, "wb") as f:
-            f.write(newbin)
-        for symbol in self._fast_symbol_cache:
-            newbin = self._fast_symbol_cache[symbol].binary
-            self.ensure_symbol_folder(symbol)
-            with open(self._get_symbol_path(self.folder, symbol), "wb") as f:
-                f.write(newbin)
+    def write_database(self, write_mode=None, atomic=None):
+        """Write all pending changes to disk.
+
+        Only symbols which were appended to since they were loaded (or last
+        written) are stored, the master file is only rewritten if symbols
+        were added or if it does not exist yet.
 
-        for symbol in self._symbol_cache:
-            newbin = SymbolConstruct.build(
-                self._symbol_cache[symbol].to_construct_dict()
+        :param write_mode: overrides the write mode given to the constructor.
+            In ``"append"`` mode the new quotes of the fast symbol cache are
+            written over the terminator of the existing file, the file is
+            rewritten completely if it does not match the loaded data.
+        :param atomic: overrides ``atomic_writes`` of the constructor. Atomic
+            writes go through temporary files and a journal, see
+            :mod:`ami2py.ami_journal`.
+        """
+        write_mode = write_mode or self.write_mode
+        atomic = self.atomic_writes if atomic is None else atomic
+        with AmiWriteBatch(self.folder, atomic=atomic) as batch:
+            master_written = self._master_modified or not os.path.isfile(
+                self._master_path
             )
-            self.ensure_symbol_folder(symbol)
-            with open(self._get_symbol_path(self.folder, symbol), "wb") as f:
-                f.write(newbin)
+            if master_written:
+                batch.replace(self._master_path, self._master.to_binary())
+
+            stored = []
+            written = []
+            # facades held by the caller may have been changed after eviction
+            self._fast_symbol_cache.restore_modified()
+            for symbol, facade in self._fast_symbol_cache.items():
+                if not facade.modified:
+                    continue
+                self.ensure_symbol_folder(symbol)
+                symbol_path = self._get_symbol_path(self.folder, symbol)
+                if write_mode == WRITE_MODE_APPEND and self._can_append(
+                    symbol_path, facade
+                ):
+                    batch.append(
+                        symbol_path,
+                        NUM_HEADER_BYTES + facade.stored_length * OVERALL_ENTRY_BYTES,
+                        facade.appended_binary(),
+                        facade.length,
+                    )
+                else:
+                    batch.replace(symbol_path, facade.binary)
+                stored.append(facade)
+                written.append(symbol)
+
+            for symbol, symbol_data in self._symbol_cache.items():
+                if not self._symbol_data_changed(symbol, symbol_data):
+                    continue
+                newbin = symbol_data.to_binary()
+                self._release_readonly_facade(symbol)
+                self.ensure_symbol_folder(symbol)
+                batch.replace(self._get_symbol_path(self.folder, symbol), newbin)
+                written.append(symbol)
+                self._stored_counts[symbol] = len(symbol_data.Entries)
+
+            batch.commit()
+        if self.catalog is not None:
+            self._update_catalog(written, master_written)
+        for facade in stored:
+            facade.mark_stored()
+        self._master_modified = False
+        for symbol in self._modified_symbols:
+            self._symbol_cache.unpin(symbol)
+        self._modified_symbols.clear()
+
+    def _update_catalog(self, symbols, master_written):
+        for symbol in symbols:
+            self.catalog.refresh(symbol)
+        if master_written:
+            self.catalog.set_symbols(self._master.get_symbols())
+        self.catalog.save()
+
+    def update_catalog(self):
+        """Bring the catalog up to date with all symbol files and store it.
+
+        Only files which changed since they were recorded are read.
+        """
+        assert self.catalog is not None, "the database was opened without catalog"
+        self.get_symbols()
+        self.get_catalog()
+        self.catalog.save()
+
+    def get_catalog(self, symbols=None):
+        """Metadata of the stored symbol files from the catalog.
+
+        Stale entries are refreshed, which only reads the header and the
+        first and last record of the changed files. Symbols without file are
+        left out.
+
+        :param symbols: iterable of symbol names, all symbols if None
+        :return: dict of symbol to dict with ``path``, ``size``, ``mtime_ns``,
+            ``bars``, ``first`` and ``last`` (``datetime.datetime`` or None)
+            and the ``header`` fields
+        """
+        assert self.catalog is not None, "the database was opened without catalog"
+        if symbols is None:
+            symbols = self.get_symbols()
+        result = {}
+        for symbol in symbols:
+            entry = self.catalog.entry(symbol)
+            if entry is None:
+                continue
+            entry = dict(entry)
+            for key in ("first", "last"):
+                if entry[key] is not None:
+                    entry[key] = packed_to_datetime(entry[key])
+            result[symbol] = entry
+        return result
+
+    def _symbol_data_changed(self, symbol_name, data):
+        if symbol_name in self._modified_symbols:
+            return True
+        stored = self._stored_counts.get(symbol_name)
+        return stored is not None and stored != len(data.Entries)
+
+    def _has_pending_changes(self, symbol_name):
+        data = self._symbol_cache.peek(symbol_name)
+        if data is not None and self._symbol_data_changed(symbol_name, data):
+            return True
+        facade = self._fast_symbol_cache.peek(symbol_name)
+        return facade is not None and facade.modified
+
+    def mark_symbol_modified(self, symbol_name):
+        """Write the SymbolData of ``symbol_name`` on the next
+        :meth:`write_database`, e.g. after its entries were changed."""
+        self._mark_modified(symbol_name)
+
+    def _mark_modified(self, symbol):
+        """Keep changed dataclass symbols cached until they are written."""
+        self._modified_symbols.add(symbol)
+        self._symbol_cache.pin(symbol)
+
+    def cache_info(self):
+        """Hit, miss and eviction statistics of the symbol caches."""
+        return {
+            "fast": self._fast_symbol_cache.stats(),
+            "data": self._symbol_cache.stats(),
+        }
+
+    def _can_append(self, symbol_path, facade):
+        """Check whether ``symbol_path`` holds the data ``facade`` was loaded
+        from, so that only the appended quotes have to be written."""
+        stored_size = (
+            NUM_HEADER_BYTES
+            + facade.stored_length * OVERALL_ENTRY_BYTES
+            + TERMINATOR_DOUBLE_WORD_LENGTH
+        )
+        if facade.stored_length == 0 or not os.path.isfile(symbol_path):
+            return False
+        return os.path.getsize(symbol_path) == stored_size
 
     def read_data_for_symbol(self, symbol_name):
-        self._symbol_cache[symbol_name] = self.reader.get_symbol_data(symbol_name)
+        data = self.reader.get_symbol_data(symbol_name)
+        self._cache_symbol_data(symbol_name, data)
+        return data
+
+    def _cache_symbol_data(self, symbol_name, data):
+        self._stored_counts[symbol_name] = len(data.Entries)
+        self._symbol_cache[symbol_name] = data
 
     def read_fast_data_for_symbol(self, symbol_name):
-        self._fast_symbol_cache[symbol_name] = self.reader.get_fast_symbol_data(
-            symbol_name
-        )
+        facade = self.reader.get_fast_symbol_data(symbol_name)
+        self._fast_symbol_cache[symbol_name] = facade
+        return facade
 
     def read_raw_data_for_symbol(self, symbol_name):
         return self.reader.get_symbol_data_raw(symbol_name)
 
-    def get_dict_for_symbol(self, symbol_name, force_refresh=False):
-        if force_refresh or symbol_name not in self._symbol_cache:
-            self.read_data_for_symbol(symbol_name)
-        return self._symbol_cache[symbol_name].to_dict()
+    def get_dict_for_symbol(self, symbol_name, force_refresh=False, intraday=False):
+        """Columns of ``symbol_name`` as dict of lists.
+
+        :param intraday: add the time columns, True for Hour, Minute, Second,
+            MilliSec and MicroSec, ``"epoch"`` for a single EpochMicroSec
+            column, see :func:`ami2py.ami_arrays.date_columns`
+        """
+        symbol_data = self.get_symbol_data(symbol_name, force_refresh)
+        return symbol_data.to_dict(intraday=intraday)
 
     def get_symbol_data(self, symbol_name, force_refresh=False):
-        if force_refresh or symbol_name not in self._symbol_cache:
-            self.read_data_for_symbol(symbol_name)
-        return self._symbol_cache[symbol_name]
+        """SymbolData of ``symbol_name``, loaded once and then cached.
+
+        Quotes appended to the returned data, by ``append`` or to
+        ``Entries``, are written by :meth:`write_database`, which compares
+        the number of entries with the stored one. Changes to existing
+        entries are not detected, call :meth:`mark_symbol_modified` after
+        changing them or the changes are not written.
+        """
+        data = None if force_refresh else self._symbol_cache.get(symbol_name)
+        if data is None:
+            data = self.read_data_for_symbol(symbol_name)
+        return data
 
     def get_fast_symbol_data(self, symbol_name, force_refresh=False):
-        if force_refresh or symbol_name not in self._fast_symbol_cache:
-            self.read_fast_data_for_symbol(symbol_name)
-        return self._fast_symbol_cache[symbol_name]
+        facade = None if force_refresh else self._fast_symbol_cache.get(symbol_name)
+        if facade is None:
+            facade = self.read_fast_data_for_symbol(symbol_name)
+        return facade
+
+    def load_symbols(
+        self, symbols, workers=None, kind="fast", executor="thread", as_completed=False
+    ):
+        """Read and decode many symbols concurrently.
+
+        Symbols loaded as ``"fast"`` or ``"data"`` are stored in the same
+        caches as :meth:`get_fast_symbol_data` and :meth:`get_symbol_data`,
+        symbols already held there are returned from the cache.
+
+        :param symbols: iterable of symbol names
+        :param workers: number of workers, defaults to the executor default
+        :param kind: ``"fast"`` (AmiSymbolDataFacade), ``"data"`` (SymbolData),
+            ``"dict"`` (column dictionary) or ``"array"`` (NumPy records)
+        :param executor: ``"thread"`` or ``"process"``. Parsing through
+            construct for ``"data"`` and ``"dict"`` is CPU bound and scales
+            with processes only.
+        :param as_completed: return an iterator of ``(symbol, result)`` pairs
+            in the order the symbols finish instead of a dictionary
+        :return: dict of symbol to result or iterator of pairs
+        """
+        assert kind in SYMBOL_LOADERS, f"kind must be one of {list(SYMBOL_LOADERS)}"
+        assert executor in ("thread", "process")
+        symbols = list(symbols)
+        results = self._iter_loaded_symbols(symbols, workers, kind, executor)
+        if as_completed:
+            return results
+        loaded = dict(results)
+        return {symbol: loaded[symbol] for symbol in symbols}
+
+    def _iter_loaded_symbols(self, symbols, workers, kind, executor):
+        cache = {"fast": self._fast_symbol_cache, "data": self._symbol_cache}.get(kind)
+        pending = []
+        for symbol in symbols:
+            if cache is not None and symbol in cache:
+                yield symbol, cache[symbol]
+            else:
+                pending.append(symbol)
+        if not pending:
+            return
+
+        # the executors are imported when needed to keep the import fast
+        from concurrent.futures import (
+            ThreadPoolExecutor,
+            ProcessPoolExecutor,
+            as_completed as futures_as_completed,
+        )
+
+        loader = SYMBOL_LOADERS[kind]
+        if executor == "process":
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_load_worker,
+                initargs=(
+                    self.folder,
+                    self._use_compiled,
+                    self._use_construct,
+                    self._columnar,
+                ),
+            )
+            submit = functools.partial(pool.submit, _load_in_worker, loader)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+            load = getattr(self.reader, loader)
+            submit = functools.partial(pool.submit, load)
+
+        with pool:
+            futures = {submit(symbol): symbol for symbol in pending}
+            for future in futures_as_completed(futures):
+                symbol = futures[future]
+                result = future.result()
+                if cache is self._symbol_cache:
+                    self._cache_symbol_data(symbol, result)
+                elif cache is not None:
+                    cache[symbol] = result
+                yield symbol, result
+
+    def iter_chunks(
+        self,
+        symbols=None,
+        chunk_size=DEFAULT_CHUNK_RECORDS,
+        max_resident_bytes=None,
+        kind="array",
+    ):
+        """Stream the stored quotes of many symbols with bounded memory.
+
+        Nothing is added to the symbol caches and quotes which are not
+        written yet are not included, see :meth:`AmiReader.iter_chunks`.
+
+        :param symbols: symbols to scan, all symbols of the database if None
+        :param chunk_size: maximum number of records per chunk
+        :param max_resident_bytes: limit for the mapped records of a chunk,
+            reduces ``chunk_size`` if necessary
+        :param kind: ``"array"`` or ``"records"``
+        :return: generator of ``(symbol, chunk)`` tuples
+        """
+        if symbols is None:
+            symbols = self.get_symbols()
+        if max_resident_bytes is not None:
+            chunk_size = max(
+                1, min(chunk_size, max_resident_bytes // OVERALL_ENTRY_BYTES)
+            )
+        for symbol in symbols:
+            for chunk in self.reader.iter_chunks(symbol, chunk_size, kind):
+                yield symbol, chunk
+
+    def _tail_records(self, symbol_name, n):
+        if symbol_name in self._fast_symbol_cache:
+            return self._fast_symbol_cache[symbol_name].tail_records(n)
+        data = self._symbol_cache.peek(symbol_name)
+        if data is not None and self._symbol_data_changed(symbol_name, data):
+            entries = data.Entries
+            return encode_entries(entries[max(len(entries) - n, 0) :]) if n > 0 else b""
+        return self.reader.get_tail_records(symbol_name, n)
+
+    def get_last_bars(self, symbol_name, n=1):
+        """The last ``n`` quotes of ``symbol_name``.
+
+        Only the end of the symbol file is read, quotes appended but not
+        written yet are included. The quotes have the format of
+        :meth:`get_fast_symbol_data` entries.
+        """
+        return read_entries(self._tail_records(symbol_name, n))
+
+    def get_last_timestamp(self, symbol_name):
+        """Date of the last quote of ``symbol_name``, see :meth:`get_last_bars`.
+
+        :return: ``datetime.datetime``, midnight for end of day quotes, None
+            if the symbol has no quotes
+        """
+        if self.catalog is not None and not self._has_pending_changes(symbol_name):
+            return self.catalog.last_timestamp(symbol_name)
+        record = self._tail_records(symbol_name, 1)
+        if not record:
+            return None
+        return packed_to_datetime(struct.unpack_from("<Q", record)[0])
+
+    def get_last_timestamps(self, symbols=None):
+        """:meth:`get_last_timestamp` for many symbols.
+
+        :param symbols: iterable of symbol names, all symbols if None
+        :return: dict of symbol to last timestamp
+        """
+        if symbols is None:
+            symbols = self.get_symbols()
+        return {symbol: self.get_last_timestamp(symbol) for symbol in symbols}
+
+    def iter_record_batches(
+        self,
+        symbols=None,
+        chunk_size=DEFAULT_CHUNK_RECORDS,
+        partition_by=None,
+        workers=None,
+    ):
+        """Stream the stored quotes as Arrow record batches with the columns
+        Symbol, Date, Open, High, Low, Close, Volume, AUX1 and AUX2.
+
+        Like :meth:`iter_chunks` quotes which are not written yet are not
+        included. Requires pyarrow, see :mod:`ami2py.ami_arrow`.
+
+        :param symbols: symbols to export, all symbols if None
+        :param chunk_size: maximum number of quotes per batch
+        :param partition_by: None or ``"year"`` to add a year column
+        :param workers: number of converting threads
+        """
+        from .ami_arrow import iter_record_batches
+
+        if symbols is None:
+            symbols = self.get_symbols()
+        return iter_record_batches(
+            self.reader, symbols, chunk_size, partition_by, workers
+        )
+
+    def export_parquet(
+        self,
+        path,
+        symbols=None,
+        chunk_size=DEFAULT_CHUNK_RECORDS,
+        partition_by=None,
+        workers=None,
+        **write_options,
+    ):
+        """Write the stored quotes as a Parquet dataset into ``path``.
+
+        The symbols are streamed through :meth:`iter_record_batches`, so the
+        memory in use does not grow with the database.
+
+        :param partition_by: None or ``"year"`` for ``year=...`` folders
+        :param write_options: passed on to ``pyarrow.dataset.write_dataset``
+        """
+        from .ami_arrow import export_parquet
+
+        if symbols is None:
+            symbols = self.get_symbols()
+        export_parquet(
+            self.reader,
+            path,
+            symbols,
+            chunk_size,
+            partition_by=partition_by,
+            workers=workers,
+            **write_options,
+        )
+
+    def get_range(self, symbol_name, start=None, end=None):
+        """Quotes of ``symbol_name`` dated between ``start`` and ``end``.
+
+        The dates are found by binary search if they are sorted, see
+        :meth:`AmiSymbolDataFacade.get_range`.
+        """
+        return self.get_fast_symbol_data(symbol_name).get_range(start, end)
+
+    def at(self, symbol_name, date):
+        """Quote of ``symbol_name`` at ``date``, raises KeyError if missing."""
+        return self.get_fast_symbol_data(symbol_name).at(date)
+
+    def get_symbol_array(self, symbol_name):
+        """Return the quotes of ``symbol_name`` as a NumPy structured array.
+
+        Symbols held in the fast symbol cache are returned from memory so that
+        pending appends are included, otherwise the file is mapped directly.
+        """
+        if symbol_name in self._fast_symbol_cache:
+            return self._fast_symbol_cache[symbol_name].to_numpy()
+        return self.reader.get_symbol_array(symbol_name)
+
+    def panel(
+        self, symbols, field=CLOSE, start=None, end=None, how="union", fill=None
+    ):
+        """Values of ``field`` for many symbols aligned on their dates.
+
+        The sorted date columns of the symbols are merged and every symbol is
+        placed into the matrix by binary search, see
+        :func:`ami2py.ami_arrays.align_columns`. Pending appends of the fast
+        symbol cache are included. Requires numpy.
+
+        :param symbols: list of symbol names, one column each
+        :param field: value column, e.g. ``"Close"`` or ``"Volume"``
+        :param start: first date (inclusive), see :meth:`get_range`
+        :param end: last date (inclusive)
+        :param how: ``"union"`` or ``"intersect"`` of the dates
+        :param fill: None for NaN where a symbol has no quote, ``"ffill"`` to
+            repeat the last quote
+        :return: :class:`ami2py.ami_arrays.Panel` of the ``datetime64[us]``
+            dates, the symbols and a float32 array of shape
+            (dates, symbols)
+        """
+        assert field in VALUE_COLUMNS, f"field must be one of {VALUE_COLUMNS}"
+        symbols = list(symbols)
+        date_columns = []
+        value_columns = []
+        for symbol in symbols:
+            records = self.get_symbol_array(symbol)
+            if start is not None or end is not None:
+                records = records[date_mask(records[DATEPACKED], start, end)]
+            date_columns.append(records[DATEPACKED])
+            value_columns.append(records[field])
+        dates, values = align_columns(date_columns, value_columns, how, fill)
+        return Panel(decode_dates(dates), symbols, values)
+
+    def resample(self, symbol, rule, write_to=None, start=None, end=None):
+        """Bars of ``symbol`` aggregated to a coarser granularity.
+
+        The bars are computed by a segmented reduction over the decoded date
+        column, see :func:`ami2py.ami_arrays.resample_records`. Pending
+        appends of the fast symbol cache are included. Requires numpy.
+
+        :param rule: ``"<n>min"`` or ``"<n>h"`` for intraday bars, ``"D"``,
+            ``"W"`` or ``"M"`` for end of day bars
+        :param write_to: name of a symbol the bars are appended to, it is
+            added to the master file if needed. Call ``write_database`` to
+            store it.
+        :param start: first date (inclusive) of the quotes, see
+            :meth:`get_range`
+        :param end: last date (inclusive) of the quotes
+        :return: structured array with dtype
+            :data:`ami2py.ami_arrays.QUOTE_DTYPE`, one record per bar
+        """
+        records = self.get_symbol_array(symbol)
+        if start is not None or end is not None:
+            records = records[date_mask(records[DATEPACKED], start, end)]
+        bars = resample_records(records, rule)
+        if write_to is not None:
+            self.add_symbol(write_to)
+            self._writable_fast_symbol_data(write_to).extend_records(bars.tobytes())
+        return bars
 
     def append_symbol_entry(self, symbol, data: SymbolEntry):
         """Append a :class:`SymbolEntry` to ``symbol``.
@@ -171,14 +777,14 @@ class AmiDataBase(AmiDbFolderLayout):
         :param data: Instance of SymbolEntry
         :return:
         """
-        self._modified_symbols.append(symbol)
+        self._mark_modified(symbol)
         if symbol not in self._symbol_cache:
             symbol_path = self._get_symbol_path(self.folder, symbol)
             if os.path.isfile(symbol_path):
                 # load existing data so appending does not overwrite
                 self.read_data_for_symbol(symbol)
             else:
-                self._symbol_cache[symbol] = SymbolData()
+                self._symbol_cache[symbol] = self.reader.symbol_data_type()
 
         self._symbol_cache[symbol].append(data)
 
@@ -203,11 +809,12 @@ class AmiDataBase(AmiDbFolderLayout):
                 )
                 for i in range(max(symbol_lengths))
             ]
+            self._mark_modified(symbol)
             if symbol not in self._symbol_cache:
                 symbol_path = self._get_symbol_path(self.folder, symbol)
                 if os.path.isfile(symbol_path):
                     self.read_data_for_symbol(symbol)
                 else:
-                    self._symbol_cache[symbol] = SymbolData()
+                    self._symbol_cache[symbol] = self.reader.symbol_data_type()
             for entry in data:
                 self._symbol_cache[symbol].append(entry)
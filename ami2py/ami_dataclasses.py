@@ -1,6 +1,9 @@
 from dataclasses import dataclass, field, fields
-from dataclass_type_validator import dataclass_validate
-from typing import List
+from array import array
+import functools
+from collections.abc import Sequence
+from typing import Dict, List, Optional
+import struct
 from .consts import (
     DAY,
     MONTH,
@@ -21,13 +24,78 @@ from .consts import (
     SECOND,
     MINUTE,
     HOUR,
+    MASTER_HEADER_BYTES,
+    MASTER_ENTRY_BYTES,
+    MASTER_SYMBOL_BYTES,
+    MASTER_CONST,
 )
-from .ami_construct import SymbolConstruct, Master
+from .ami_records import iter_records, pack_records, RECORD_STRUCT, FLOAT_FIELDS
+from .ami_arrays import load_numpy, encode_columns, date_columns
+from operator import attrgetter
+from .ami_dates import pack_date
+
+# the construct structures are built on first access, see __getattr__
+_CONSTRUCT_NAMES = ("SymbolConstruct", "Master")
+
+
+def __getattr__(name):
+    if name in _CONSTRUCT_NAMES:
+        from . import ami_construct
+
+        return getattr(ami_construct, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def dataclass_validate():
+    """Validate the field types when an instance is created.
+
+    Wraps ``__init__`` and calls ``dataclass_type_validator`` with its
+    default options after it, including after ``__post_init__``. The
+    validator is only imported when the first instance is created.
+    """
+
+    def decorate(cls):
+        init = cls.__init__
+
+        @functools.wraps(init)
+        def __init__(self, *args, **kwargs):
+            init(self, *args, **kwargs)
+            from dataclass_type_validator import dataclass_type_validator
+
+            dataclass_type_validator(self)
+
+        cls.__init__ = __init__
+        return cls
+
+    return decorate
+
 
 SYMBOL_REST = b"\0" * (1172 - 5 - 16 - 490 + 3)
 SYMBOL_SPACE = b"\0" * (495 - 5 - 3)
 SYMBOL_STR = b"\0" * (497)
 
+# record field name -> SymbolEntry attribute
+ENTRY_FIELDS = {
+    YEAR: "Year",
+    MONTH: "Month",
+    DAY: "Day",
+    HOUR: "Hour",
+    MINUTE: "Minute",
+    SECOND: "Second",
+    MILLI_SEC: "Milli_sec",
+    MICRO_SEC: "Micro_second",
+    RESERVED: "Reserved",
+    FUT: "Future",
+    CLOSE: "Close",
+    OPEN: "Open",
+    HIGH: "High",
+    LOW: "Low",
+    VOLUME: "Volume",
+    AUX_1: "Aux_1",
+    AUX_2: "Aux_2",
+    TERMINATOR: "Terminator",
+}
+
 
 @dataclass(slots=True)
 class SymbolEntry:
@@ -70,6 +138,60 @@ class SymbolEntry:
     def get_necessary_args(self):
         return ["Month", "Year", "Day", "Close", "High", "Open", "Low", "Volume"]
 
+    @classmethod
+    def from_record(cls, record):
+        """Create an entry from a tuple of :func:`ami_records.iter_records`.
+
+        The values of a record are already typed, so the checks of
+        ``__post_init__`` are skipped.
+        """
+        packed, close, open_, high, low, volume, aux_1, aux_2, terminator = record
+        entry = object.__new__(cls)
+        entry.Year = packed >> 52
+        entry.Month = (packed >> 48) & 0xF
+        entry.Day = (packed >> 43) & 0x1F
+        entry.Hour = (packed >> 38) & 0x1F
+        entry.Minute = (packed >> 32) & 0x3F
+        entry.Second = (packed >> 26) & 0x3F
+        entry.Milli_sec = (packed >> 16) & 0x3FF
+        entry.Micro_second = (packed >> 6) & 0x3FF
+        entry.Reserved = (packed >> 1) & 0x1F
+        entry.Future = packed & 0x1
+        entry.Close = close
+        entry.Open = open_
+        entry.High = high
+        entry.Low = low
+        entry.Volume = volume
+        entry.Aux_1 = aux_1
+        entry.Aux_2 = aux_2
+        entry.Terminator = terminator
+        return entry
+
+    def to_record(self):
+        """Inverse of :meth:`from_record`."""
+        packed = pack_date(
+            self.Year,
+            self.Month,
+            self.Day,
+            self.Hour,
+            self.Minute,
+            self.Second,
+            self.Milli_sec,
+            self.Micro_second,
+        )
+        packed |= ((self.Reserved & 0x1F) << 1) | (self.Future & 0x1)
+        return (
+            packed,
+            self.Close,
+            self.Open,
+            self.High,
+            self.Low,
+            self.Volume,
+            self.Aux_1,
+            self.Aux_2,
+            self.Terminator,
+        )
+
     def set_by_construct(self, con_data):
         date_data = con_data[DATEPACKED]
         self.Future = date_data[FUT]
@@ -135,7 +257,21 @@ class SymbolData:
         ]
         return self
 
-    def to_dict(self):
+    def set_by_binary(self, binary):
+        """Read the content of a symbol file without construct.
+
+        Gives the same result as ``set_by_construct(SymbolConstruct.parse(binary))``.
+        """
+        self.Header = bytes(binary[:0x4A0])
+        self.Entries = [SymbolEntry.from_record(el) for el in iter_records(binary)]
+        return self
+
+    def to_dict(self, intraday=False):
+        """Columns of the entries as dict of lists.
+
+        :param intraday: add the time columns, see
+            :func:`ami2py.ami_arrays.date_columns`. Requires numpy.
+        """
         result = {
             DAY: [],
             MONTH: [],
@@ -156,6 +292,9 @@ class SymbolData:
             result[LOW].append(el.Low)
             result[CLOSE].append(el.Close)
             result[VOLUME].append(el.Volume)
+        if intraday:
+            packed = [el.to_record()[0] for el in self.Entries]
+            result.update(date_columns(packed, intraday))
         return result
 
     def to_construct_dict(self):
@@ -165,9 +304,163 @@ class SymbolData:
         }
         return result
 
+    def to_binary(self):
+        """Header and records, identical to
+        ``SymbolConstruct.build(self.to_construct_dict())``."""
+        return self.Header + encode_entries(self.Entries)
+
+    def write_to_file(self, file):
+        file.write(self.to_binary())
+
+
+def encode_entries(entries):
+    """Encode SymbolEntry objects into consecutive 40 byte records.
+
+    With numpy the values are collected per field and packed column wise by
+    :func:`ami2py.ami_arrays.encode_columns`, otherwise every entry is packed
+    with struct.
+    """
+    if load_numpy() is None:
+        return pack_records(entry.to_record() for entry in entries)
+    columns = {
+        name: list(map(attrgetter(attribute), entries))
+        for name, attribute in ENTRY_FIELDS.items()
+    }
+    return encode_columns(columns, strict=False)
+
+
+class SymbolEntries(Sequence):
+    """Read only list of SymbolEntry objects created on access from the
+    columns of a :class:`ColumnarSymbolData`."""
+
+    def __init__(self, data):
+        self._data = data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._data.entry(i) for i in range(*index.indices(len(self)))]
+        return self._data.entry(index)
+
+    def append(self, entry: SymbolEntry):
+        self._data.append(entry)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+
+class ColumnarSymbolData:
+    """SymbolData storing every record field in its own ``array`` column.
+
+    The packed date is kept as uint64 and the eight values as float32, so a
+    bar needs the 40 bytes of the file format instead of a SymbolEntry
+    object. ``Entries`` creates SymbolEntry objects on access, values
+    appended through SymbolEntry are stored with float32 precision.
+    """
+
+    def __init__(self, Header: bytes = b"\0" * 0x4A0, Entries=()):
+        self.Header = Header
+        self.DatePacked = array("Q")
+        self.columns = {name: array("f") for name in FLOAT_FIELDS}
+        for entry in Entries:
+            self.append(entry)
+
+    @property
+    def Entries(self):
+        return SymbolEntries(self)
+
+    @property
+    def nbytes(self):
+        return len(self.Header) + len(self) * RECORD_STRUCT.size
+
+    def __len__(self):
+        return len(self.DatePacked)
+
+    def __eq__(self, other):
+        if not isinstance(other, ColumnarSymbolData):
+            return NotImplemented
+        return (
+            self.Header == other.Header
+            and self.DatePacked == other.DatePacked
+            and self.columns == other.columns
+        )
+
+    def __repr__(self):
+        return f"ColumnarSymbolData(length={len(self)})"
+
+    def entry(self, index):
+        return SymbolEntry.from_record(self.record(index))
+
+    def record(self, index):
+        """Values of bar ``index`` as a tuple of :func:`ami_records.iter_records`."""
+        return (self.DatePacked[index],) + tuple(
+            self.columns[name][index] for name in FLOAT_FIELDS
+        )
+
+    def append(self, entry: SymbolEntry):
+        self._append_records([entry.to_record()])
+
+    def _append_records(self, records):
+        columns = list(zip(*records))
+        if not columns:
+            return
+        self.DatePacked.extend(columns[0])
+        for name, values in zip(FLOAT_FIELDS, columns[1:]):
+            self.columns[name].extend(values)
+
+    def set_by_construct(self, con_data):
+        self.__init__(Header=con_data["Header"])
+        self._append_records(
+            SymbolEntry().set_by_construct(el).to_record() for el in con_data["Entries"]
+        )
+        return self
+
+    def set_by_binary(self, binary):
+        self.__init__(Header=bytes(binary[:0x4A0]))
+        self._append_records(iter_records(binary))
+        return self
+
+    def to_dict(self, intraday=False):
+        """Columns as dict of lists, see :meth:`SymbolData.to_dict`."""
+        dates = self.DatePacked
+        result = {
+            DAY: [(packed >> 43) & 0x1F for packed in dates],
+            MONTH: [(packed >> 48) & 0xF for packed in dates],
+            YEAR: [packed >> 52 for packed in dates],
+            OPEN: self.columns[OPEN].tolist(),
+            HIGH: self.columns[HIGH].tolist(),
+            LOW: self.columns[LOW].tolist(),
+            CLOSE: self.columns[CLOSE].tolist(),
+            VOLUME: self.columns[VOLUME].tolist(),
+        }
+        if intraday:
+            result.update(date_columns(dates, intraday))
+        return result
+
+    def to_construct_dict(self):
+        return {
+            "Header": self.Header,
+            "Entries": [el.to_construct_dict() for el in self.Entries],
+        }
+
+    def to_binary(self):
+        """Header and records as written by ``SymbolConstruct.build``."""
+        np = load_numpy()
+        if np is None:
+            columns = (self.columns[name] for name in FLOAT_FIELDS)
+            return self.Header + pack_records(zip(self.DatePacked, *columns))
+        from .ami_arrays import QUOTE_DTYPE
+
+        records = np.empty(len(self), dtype=QUOTE_DTYPE)
+        records[DATEPACKED] = np.frombuffer(self.DatePacked, dtype=np.uint64)
+        for name in FLOAT_FIELDS:
+            records[name] = np.frombuffer(self.columns[name], dtype=np.float32)
+        return self.Header + records.tobytes()
+
     def write_to_file(self, file):
-        binary = SymbolConstruct.build(self.to_construct_dict())
-        file.write(binary)
+        file.write(self.to_binary())
 
 
 @dataclass_validate()
@@ -181,6 +474,14 @@ class MasterEntry:
         result = {"Symbol": self.Symbol, "Rest": self.Rest, "Const": None}
         return result
 
+    @classmethod
+    def from_parsed(cls, symbol, rest):
+        """Create an entry from already checked values without validation."""
+        entry = object.__new__(cls)
+        entry.Symbol = symbol
+        entry.Rest = rest
+        return entry
+
     def set_by_construct(self, con_data):
         if type(con_data["Symbol"]) != str:
             return self
@@ -196,13 +497,40 @@ class MasterData:
     Header: bytes = b"BROKMAS2"
     NumSymbols: int = 0
     Symbols: List[MasterEntry] = field(default_factory=list)
+    # symbol name -> position in Symbols, built on first use
+    _index: Optional[Dict[str, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def write_to_file(self, file):
-        Master.build()
+        file.write(self.to_binary())
 
     def append_symbol(self, symbol: str, rest: bytes = SYMBOL_REST):
+        """Append ``symbol`` unless it is already contained.
+
+        :return: True if the symbol was appended
+        """
+        if symbol in self:
+            return False
         self.Symbols.append(MasterEntry(Symbol=symbol, Rest=rest))
         self.NumSymbols= len(self.Symbols)
+        self._index[symbol] = len(self.Symbols) - 1
+        return True
+
+    def index_of(self, symbol: str):
+        """Position of ``symbol`` in Symbols, None if it is not contained."""
+        return self._get_index().get(symbol)
+
+    def __contains__(self, symbol):
+        return symbol in self._get_index()
+
+    def _get_index(self):
+        if self._index is None:
+            index = {}
+            for position, entry in enumerate(self.Symbols):
+                index.setdefault(entry.Symbol, position)
+            self._index = index
+        return self._index
 
 
     def get_symbols(self):
@@ -222,4 +550,46 @@ class MasterData:
         self.Symbols = [
             MasterEntry().set_by_construct(el) for el in con_data["Symbols"]
         ]
+        self._index = None
+        return self
+
+    def to_binary(self):
+        """Content of the broker.master file.
+
+        Gives the same result as ``Master.build(self.to_construct_dict())``.
+        """
+        parts = [self.Header, struct.pack("<I", self.NumSymbols)]
+        for entry in self.Symbols:
+            name = entry.Symbol.encode("ascii")
+            if len(name) >= MASTER_SYMBOL_BYTES:
+                raise ValueError(f"Symbol name {entry.Symbol!r} is too long")
+            parts.append(name.ljust(MASTER_SYMBOL_BYTES, b"\0"))
+            parts.append(MASTER_CONST)
+            parts.append(entry.Rest)
+        return b"".join(parts)
+
+    def set_by_binary(self, binary):
+        """Read the content of a broker.master file.
+
+        Gives the same result as ``set_by_construct(Master.parse(binary))``
+        by slicing the fixed width records directly. Like construct's
+        GreedyRange, reading stops at the first record that can not be parsed.
+        """
+        self.Header = bytes(binary[:8])
+        (self.NumSymbols,) = struct.unpack_from("<I", binary, 8)
+        symbols = []
+        const_end = MASTER_SYMBOL_BYTES + len(MASTER_CONST)
+        last_start = len(binary) - MASTER_ENTRY_BYTES
+        for start in range(MASTER_HEADER_BYTES, last_start + 1, MASTER_ENTRY_BYTES):
+            record = binary[start : start + MASTER_ENTRY_BYTES]
+            name_end = record.find(b"\0", 0, MASTER_SYMBOL_BYTES)
+            if name_end < 0 or record[MASTER_SYMBOL_BYTES:const_end] != MASTER_CONST:
+                break
+            try:
+                symbol = record[:name_end].decode("ascii")
+            except UnicodeDecodeError:
+                break
+            symbols.append(MasterEntry.from_parsed(symbol, record[const_end:]))
+        self.Symbols = symbols
+        self._index = None
         return self
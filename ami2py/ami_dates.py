@@ -0,0 +1,86 @@
+"""Conversion between python dates and the packed AmiBroker date format.
+
+The packed date is a 64 bit integer with the year in the highest bits, so
+comparing packed values compares the dates. This makes it possible to
+search the sorted quotes of a symbol file without decoding them.
+"""
+import datetime
+
+# all bits below the day: hour, minute, second, milli- and microseconds,
+# reserved and future flag
+TIME_BITS = (1 << 43) - 1
+# reserved and future flag
+FLAG_BITS = 0x3F
+
+
+def pack_date(
+    year,
+    month,
+    day,
+    hour=0,
+    minute=0,
+    second=0,
+    milli_sec=0,
+    micro_sec=0,
+):
+    return (
+        ((year & 0xFFF) << 52)
+        | ((month & 0xF) << 48)
+        | ((day & 0x1F) << 43)
+        | ((hour & 0x1F) << 38)
+        | ((minute & 0x3F) << 32)
+        | ((second & 0x3F) << 26)
+        | ((milli_sec & 0x3FF) << 16)
+        | ((micro_sec & 0x3FF) << 6)
+    )
+
+
+def date_to_packed(value, end=False):
+    """Convert ``value`` into a packed date usable as search bound.
+
+    :param value: ``datetime.datetime``, ``datetime.date`` or an already
+        packed integer
+    :param end: create an inclusive upper bound. For plain dates every bar of
+        that day (including end of day bars) is below the bound.
+    :return: packed date as int
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime.datetime):
+        packed = pack_date(
+            value.year,
+            value.month,
+            value.day,
+            value.hour,
+            value.minute,
+            value.second,
+            value.microsecond // 1000,
+            value.microsecond % 1000,
+        )
+        return packed | FLAG_BITS if end else packed
+    if isinstance(value, datetime.date):
+        packed = pack_date(value.year, value.month, value.day)
+        return packed | TIME_BITS if end else packed
+    raise TypeError(f"Can not convert {value!r} into a packed date")
+
+
+def packed_to_datetime(packed):
+    """Convert a packed date into a ``datetime.datetime``.
+
+    End of day bars, which have all time bits set, map to midnight.
+    """
+    year = packed >> 52
+    month = (packed >> 48) & 0xF
+    day = (packed >> 43) & 0x1F
+    hour = (packed >> 38) & 0x1F
+    if hour > 23:
+        return datetime.datetime(year, month, day)
+    return datetime.datetime(
+        year,
+        month,
+        day,
+        hour,
+        (packed >> 32) & 0x3F,
+        (packed >> 26) & 0x3F,
+        ((packed >> 16) & 0x3FF) * 1000 + ((packed >> 6) & 0x3FF),
+    )
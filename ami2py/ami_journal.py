@@ -0,0 +1,268 @@
+"""Crash safe writing of several database files as one batch.
+
+Complete files are first written to temporary files next to their target,
+appends are kept in memory. On commit a journal describing all operations is
+stored atomically in the database folder, then the temporary files are
+renamed onto their targets and the appends are applied. If the process dies
+before the journal is stored, the temporary files are removed on the next
+open (roll back), afterwards the journal is replayed (roll forward).
+
+An atomic batch holds an exclusive lock on a lock file in the database
+folder until it is committed or closed. Recovery is skipped while another
+batch holds the lock, so opening the database does not remove the temporary
+files of a batch that is still being written. The lock is released by the
+operating system if the writing process dies.
+"""
+import base64
+import json
+import os
+import struct
+
+from .consts import HEADER_LENGTH_OFFSET
+from .errors import JournalError
+
+JOURNAL_FILE = "ami2py.journal"
+PENDING_FILE = "ami2py.journal.pending"
+LOCK_FILE = "ami2py.lock"
+TEMP_SUFFIX = ".ami2py-tmp"
+
+
+def _lock(folder, blocking=True):
+    """Open and exclusively lock the lock file of ``folder``.
+
+    :return: the open lock file, None if it is locked and not ``blocking``
+    """
+    f = open(os.path.join(folder, LOCK_FILE), "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+            msvcrt.locking(f.fileno(), mode, 1)
+        else:
+            import fcntl
+
+            mode = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            fcntl.flock(f.fileno(), mode)
+    except OSError:
+        f.close()
+        if blocking:
+            raise
+        return None
+    return f
+
+
+def _unlock(f):
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()
+
+
+def _fsync_folder(folder):
+    if os.name == "nt":
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_file(path, data, sync):
+    with open(path, "wb") as f:
+        f.write(data)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _append_records(path, offset, data, length, sync):
+    """Write ``data`` at ``offset``, cut the file behind it and patch the length."""
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+        f.truncate(offset + len(data))
+        f.seek(HEADER_LENGTH_OFFSET)
+        f.write(struct.pack("<I", length))
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class AmiWriteBatch:
+    """Writes symbol and master files, optionally as one atomic batch.
+
+    Without ``atomic`` every operation is applied immediately, which is the
+    fastest but not crash safe way of writing. An atomic batch locks the
+    database folder until :meth:`commit` or :meth:`close`, use it as a
+    context manager to release the lock if writing fails.
+    """
+
+    def __init__(self, folder, atomic=False):
+        self.folder = os.fspath(folder)
+        self.atomic = atomic
+        self._operations = []
+        self._pending = None
+        self._lock = _lock(self.folder) if atomic else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the pending log and the lock.
+
+        Temporary files of a batch which was not committed are removed by
+        the next recovery.
+        """
+        try:
+            if self._pending is not None:
+                self._pending.close()
+                self._pending = None
+        finally:
+            if self._lock is not None:
+                _unlock(self._lock)
+                self._lock = None
+
+    def replace(self, path, data):
+        """Replace the complete content of ``path`` with ``data``."""
+        if not self.atomic:
+            _write_file(path, data, sync=False)
+            return
+        temp_path = path + TEMP_SUFFIX
+        try:
+            self._log_pending(temp_path)
+            _write_file(temp_path, data, sync=True)
+        except BaseException:
+            self.close()
+            raise
+        self._operations.append(
+            {"path": self._relative(path), "temp": self._relative(temp_path)}
+        )
+
+    def append(self, path, offset, data, length):
+        """Write appended records at ``offset`` and set the header length."""
+        if not self.atomic:
+            _append_records(path, offset, data, length, sync=False)
+            return
+        self._operations.append(
+            {
+                "path": self._relative(path),
+                "offset": offset,
+                "length": length,
+                "data": base64.b64encode(bytes(data)).decode("ascii"),
+            }
+        )
+
+    def commit(self):
+        """Make all operations of the batch visible and release the lock.
+
+        :raises JournalError: if a temporary file of the batch is missing,
+            e.g. because it was removed by another process. Nothing is
+            written in that case.
+        """
+        if not self.atomic:
+            return
+        try:
+            if self._pending is not None:
+                self._pending.close()
+                self._pending = None
+            if self._lock is None:
+                raise JournalError("The batch was closed before it was committed")
+            missing = [
+                operation["temp"]
+                for operation in self._operations
+                if "temp" in operation
+                and not os.path.isfile(os.path.join(self.folder, operation["temp"]))
+            ]
+            if missing:
+                raise JournalError(f"Temporary files are missing: {', '.join(missing)}")
+            if self._operations:
+                journal_path = os.path.join(self.folder, JOURNAL_FILE)
+                temp_path = journal_path + TEMP_SUFFIX
+                _write_file(
+                    temp_path, json.dumps(self._operations).encode(), sync=True
+                )
+                os.replace(temp_path, journal_path)
+                _fsync_folder(self.folder)
+            _recover(self.folder)
+            self._operations = []
+        finally:
+            self.close()
+
+    def _log_pending(self, temp_path):
+        if self._pending is None:
+            self._pending = open(os.path.join(self.folder, PENDING_FILE), "a")
+        self._pending.write(self._relative(temp_path) + "\n")
+        self._pending.flush()
+        os.fsync(self._pending.fileno())
+
+    def _relative(self, path):
+        return os.path.relpath(path, self.folder)
+
+
+def recover_journal(folder):
+    """Finish or roll back an interrupted batch in ``folder``.
+
+    Nothing is done while another batch holds the lock of the folder.
+
+    :return: ``"rolled_forward"``, ``"rolled_back"`` or None if nothing was done
+    """
+    folder = os.fspath(folder)
+    if not any(
+        os.path.isfile(os.path.join(folder, name))
+        for name in (JOURNAL_FILE, PENDING_FILE)
+    ):
+        return None
+    lock = _lock(folder, blocking=False)
+    if lock is None:
+        return None
+    try:
+        return _recover(folder)
+    finally:
+        _unlock(lock)
+
+
+def _recover(folder):
+    journal_path = os.path.join(folder, JOURNAL_FILE)
+    pending_path = os.path.join(folder, PENDING_FILE)
+    result = None
+    if os.path.isfile(journal_path):
+        with open(journal_path, "rb") as f:
+            operations = json.loads(f.read())
+        folders = set()
+        for operation in operations:
+            path = os.path.join(folder, operation["path"])
+            folders.add(os.path.dirname(path))
+            if "temp" in operation:
+                temp_path = os.path.join(folder, operation["temp"])
+                # a missing temp file has been renamed before the interruption
+                if os.path.isfile(temp_path):
+                    os.replace(temp_path, path)
+            else:
+                data = base64.b64decode(operation["data"])
+                _append_records(
+                    path, operation["offset"], data, operation["length"], sync=True
+                )
+        for changed_folder in folders:
+            _fsync_folder(changed_folder)
+        os.remove(journal_path)
+        result = "rolled_forward"
+    if os.path.isfile(pending_path):
+        with open(pending_path) as f:
+            temp_files = [line.strip() for line in f if line.strip()]
+        for temp_file in temp_files:
+            temp_path = os.path.join(folder, temp_file)
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+                result = result or "rolled_back"
+        os.remove(pending_path)
+    return result
@@ -0,0 +1,107 @@
+"""Conversion between the quote records of symbol files and pandas DataFrames.
+
+Both directions work on whole columns: the packed dates are decoded and
+encoded with the vectorized functions of :mod:`ami2py.ami_arrays` and the
+values are taken from a structured array view onto the 40 byte records, no
+object is created per quote. pandas is an optional dependency and is only
+imported when one of the functions is called.
+"""
+from .ami_arrays import (
+    decode_dates,
+    require_numpy,
+    np,
+    DATE_BITFIELDS,
+    INTRADAY_COLUMNS,
+    VALUE_COLUMNS,
+)
+from .consts import (
+    DATEPACKED,
+    YEAR,
+    MONTH,
+    DAY,
+    HOUR,
+    MINUTE,
+    SECOND,
+    MILLI_SEC,
+    MICRO_SEC,
+    OPEN,
+    HIGH,
+    LOW,
+    CLOSE,
+    VOLUME,
+    AUX_1,
+    AUX_2,
+)
+
+FRAME_COLUMNS = (OPEN, HIGH, LOW, CLOSE, VOLUME, AUX_1, AUX_2)
+INDEX_NAME = "Date"
+# AmiBroker marks end of day quotes by setting all bits of the time fields
+EOD_TIME_COLUMNS = {
+    name: mask for name, _, mask in DATE_BITFIELDS if name in INTRADAY_COLUMNS
+}
+
+
+def require_pandas():
+    require_numpy()
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError("pandas is required for DataFrame access: pip install pandas")
+    return pandas
+
+
+def records_to_frame(records, columns=FRAME_COLUMNS):
+    """Create a DataFrame from a structured array of quote records.
+
+    :param records: array with dtype :data:`ami2py.ami_arrays.QUOTE_DTYPE`
+    :param columns: value columns of the frame
+    :return: DataFrame with a ``DatetimeIndex`` named ``Date``, end of day
+        quotes are dated at midnight. The values are copied, the frame does
+        not reference ``records``.
+    """
+    pd = require_pandas()
+    index = pd.DatetimeIndex(decode_dates(records[DATEPACKED]), name=INDEX_NAME)
+    return pd.DataFrame(
+        {name: np.array(records[name]) for name in columns}, index=index
+    )
+
+
+def frame_to_columns(frame, eod=None):
+    """Split a DataFrame into the columns taken by
+    :func:`ami2py.ami_arrays.encode_columns`.
+
+    The dates are taken from the index, which has to be convertible into a
+    ``DatetimeIndex``. Time zone aware indexes are converted to their local
+    time. Columns named like the record values (``Open``, ``High``, ``Low``,
+    ``Close``, ``Volume``, ``AUX1``, ``AUX2``) are used, others are ignored.
+
+    :param eod: store the rows as end of day quotes, which
+        :func:`records_to_frame` dates at midnight. None does so if every
+        date of the index is at midnight.
+    :return: dict of column name to NumPy array
+    """
+    pd = require_pandas()
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    if eod is None:
+        eod = len(index) > 0 and bool((index == index.normalize()).all())
+    columns = {
+        YEAR: index.year.to_numpy(),
+        MONTH: index.month.to_numpy(),
+        DAY: index.day.to_numpy(),
+    }
+    if eod:
+        for name, marker in EOD_TIME_COLUMNS.items():
+            columns[name] = np.full(len(index), marker)
+    else:
+        micro_seconds = index.microsecond.to_numpy()
+        columns[HOUR] = index.hour.to_numpy()
+        columns[MINUTE] = index.minute.to_numpy()
+        columns[SECOND] = index.second.to_numpy()
+        columns[MILLI_SEC] = micro_seconds // 1000
+        columns[MICRO_SEC] = micro_seconds % 1000
+    for name in VALUE_COLUMNS:
+        if name in frame.columns:
+            columns[name] = frame[name].to_numpy(dtype=np.float32)
+    return columns
@@ -1,50 +1,101 @@
-from construct import Struct, Bytes, GreedyRange
-from .ami_dataclasses import SymbolEntry, SymbolData, MasterData
-from .ami_construct import Master, SymbolConstruct
-from .ami_symbol_facade import AmiSymbolDataFacade
+from .ami_dataclasses import SymbolData, ColumnarSymbolData, MasterData
+from .ami_symbol_facade import AmiSymbolDataFacade, read_entries
 # from .ami_symbol import compiled as SymbolConstruct
 from .consts import YEAR, DAY, MONTH, CLOSE, OPEN, HIGH, LOW, VOLUME, DATEPACKED
 import os
 import mmap
+import struct
+import threading
 from .ami_database_folder_layout import AmiDbFolderLayout
+from .ami_dates import packed_to_datetime
+from .ami_arrays import (
+    records_from_buffer,
+    count_records,
+    date_columns,
+    require_numpy,
+)
+from .ami_records import parse_symbol, RECORD_STRUCT
+from .consts import NUM_HEADER_BYTES, OVERALL_ENTRY_BYTES
 
 ERROR_RETURNED = True
+# records per chunk of iter_chunks, 2.5 MB
+DEFAULT_CHUNK_RECORDS = 65536
 
 VALUE_INDEX = 2
 BROKER_MASTER = "broker.master"
 
 
 class AmiReader(AmiDbFolderLayout):
-    def __init__(self, folder, use_compiled=False):
+    def __init__(
+        self,
+        folder,
+        use_compiled=False,
+        use_construct=False,
+        columnar=False,
+        readonly_facades=False,
+    ):
+        """
+        :param folder: database folder
+        :param use_compiled: use compiled construct structures in the
+            ``use_construct`` mode
+        :param use_construct: parse symbol files with construct instead of
+            the struct based decoder, e.g. to validate the decoder
+        :param columnar: return :class:`ColumnarSymbolData` instead of
+            :class:`SymbolData` from :meth:`get_symbol_data`
+        :param readonly_facades: return read only facades from
+            :meth:`get_fast_symbol_data` which keep the file memory mapped
+            instead of copying it
+        """
+        self.readonly_facades = readonly_facades
         self.__folder = folder
-        self.__symbol = SymbolConstruct
-        self.__master = Master
-        if use_compiled:
-            self.__symbol = SymbolConstruct.compile(
-                filename=os.path.join(os.path.dirname(__file__), "SymbolConstruct.py")
-            )
-            self.__master = Master.compile(
-                filename=os.path.join(os.path.dirname(__file__), "Master.py")
-            )
-
-        self.__master = self._read_master()
-        self.__symbols = self.__read_symbols()
+        self.__use_construct = use_construct
+        self.__use_compiled = use_compiled
+        self.symbol_data_type = ColumnarSymbolData if columnar else SymbolData
+        # the master file, the symbol list and the compiled structures are
+        # loaded on first use
+        self.__lock = threading.Lock()
+        self.__symbol = None
+        self.__master = None
+        self.__symbols = None
 
     def get_master(self):
-        return self.__master
+        master = self.__master
+        if master is None:
+            with self.__lock:
+                if self.__master is None:
+                    self.__master = self._read_master()
+                master = self.__master
+        return master
+
+    @property
+    def _symbol_struct(self):
+        """Construct definition of symbol files used in ``use_construct`` mode."""
+        symbol = self.__symbol
+        if symbol is None:
+            with self.__lock:
+                if self.__symbol is None:
+                    from .ami_construct import SymbolConstruct
+
+                    self.__symbol = SymbolConstruct
+                    if self.__use_compiled:
+                        self.__symbol = SymbolConstruct.compile(
+                            filename=os.path.join(
+                                os.path.dirname(__file__), "SymbolConstruct.py"
+                            )
+                        )
+                symbol = self.__symbol
+        return symbol
 
     def _read_master(self):
         binarry, errorstate, errmsg = self.__get_binarry(BROKER_MASTER)
         if errorstate:
             return MasterData()
 
-        parsed = Master.parse(binarry)
+        master = MasterData().set_by_binary(binarry)
         if hasattr(binarry, "close"):
             binarry.close()
-        return MasterData().set_by_construct(parsed)
+        return master
 
-    def __read_symbols(self):
-        return self.__master.get_symbols()
 
     def __get_binarry(self, symbol_name):
         """
@@ -60,31 +111,152 @@ class AmiReader(AmiDbFolderLayout):
         return binarry, False, ""
 
     def get_symbols(self):
-        return self.__symbols.copy()
+        symbols = self.__symbols
+        if symbols is None:
+            master = self.get_master()
+            with self.__lock:
+                if self.__symbols is None:
+                    self.__symbols = master.get_symbols()
+                symbols = self.__symbols
+        return symbols.copy()
 
-    def get_fast_symbol_data(self, symbol_name):
+    def get_fast_symbol_data(self, symbol_name, readonly=None):
+        """
+        :param readonly: return a read only facade serving the quotes from
+            the memory mapped file, defaults to ``readonly_facades``
+        """
+        if readonly is None:
+            readonly = self.readonly_facades
         binarry, errorstate, errmsg = self.__get_binarry(
             symbol_name
         )
         if errorstate:
             return AmiSymbolDataFacade()
+        if readonly:
+            return AmiSymbolDataFacade(binarry, readonly=True)
         facade = AmiSymbolDataFacade(binarry)
         if hasattr(binarry, "close"):
             binarry.close()
         return facade
 
+    def get_symbol_array(self, symbol_name):
+        """Return the quotes of ``symbol_name`` as a NumPy structured array.
+
+        The array is a read only view onto the memory mapped symbol file,
+        the file stays mapped as long as the array is referenced.
+        """
+        binarry, errorstate, errmsg = self.__get_binarry(symbol_name)
+        if errorstate:
+            return records_from_buffer(b"")
+        return records_from_buffer(binarry)
+
+    def iter_chunks(self, symbol_name, chunk_size=DEFAULT_CHUNK_RECORDS, kind="array"):
+        """Iterate over the stored quotes of ``symbol_name`` in fixed size chunks.
+
+        Only the window of the current chunk is memory mapped, it is unmapped
+        when the next chunk is requested. Array chunks are views onto that
+        window, copy them to keep them beyond the next iteration step.
+
+        :param chunk_size: maximum number of records per chunk
+        :param kind: ``"array"`` yields NumPy structured arrays with
+            :data:`ami2py.ami_arrays.QUOTE_DTYPE`, ``"records"`` yields lists
+            of record tuples as returned by
+            :func:`ami2py.ami_records.iter_records`
+        """
+        assert kind in ("array", "records")
+        assert chunk_size > 0
+        if kind == "array":
+            np = require_numpy()
+            from .ami_arrays import QUOTE_DTYPE
+        filename = self._get_symbol_path(self.__folder, symbol_name)
+        if not os.path.isfile(filename):
+            return
+        with open(filename, "rb") as f:
+            num_records = count_records(os.fstat(f.fileno()).st_size)
+            for start in range(0, num_records, chunk_size):
+                count = min(chunk_size, num_records - start)
+                offset = NUM_HEADER_BYTES + start * OVERALL_ENTRY_BYTES
+                # mmap offsets have to be multiples of the allocation granularity
+                map_offset = offset - offset % mmap.ALLOCATIONGRANULARITY
+                skip = offset - map_offset
+                window = mmap.mmap(
+                    f.fileno(),
+                    skip + count * OVERALL_ENTRY_BYTES,
+                    access=mmap.ACCESS_READ,
+                    offset=map_offset,
+                )
+                if kind == "array":
+                    chunk = np.frombuffer(
+                        window, dtype=QUOTE_DTYPE, count=count, offset=skip
+                    )
+                else:
+                    chunk = list(RECORD_STRUCT.iter_unpack(window[skip:]))
+                try:
+                    yield chunk
+                finally:
+                    del chunk
+                    try:
+                        window.close()
+                    except BufferError:
+                        # the consumer still references the chunk, the
+                        # window is unmapped once it is garbage collected
+                        pass
+
+    def get_tail_records(self, symbol_name, n):
+        """Encoded records of the last ``n`` quotes of ``symbol_name``.
+
+        The number of records follows from the file size, only the requested
+        records at the end of the file are read.
+
+        :return: bytes, empty if the symbol file does not exist
+        """
+        filename = self._get_symbol_path(self.__folder, symbol_name)
+        if n <= 0 or not os.path.isfile(filename):
+            return b""
+        with open(filename, "rb") as f:
+            num_records = count_records(os.fstat(f.fileno()).st_size)
+            n = min(n, num_records)
+            f.seek(NUM_HEADER_BYTES + (num_records - n) * OVERALL_ENTRY_BYTES)
+            return f.read(n * OVERALL_ENTRY_BYTES)
+
+    def get_last_bars(self, symbol_name, n=1):
+        """The last ``n`` quotes of ``symbol_name`` as returned by the facade."""
+        return read_entries(self.get_tail_records(symbol_name, n))
+
+    def get_last_timestamp(self, symbol_name):
+        """Date of the last quote of ``symbol_name``, None without quotes.
+
+        :return: ``datetime.datetime``, midnight for end of day quotes
+        """
+        record = self.get_tail_records(symbol_name, 1)
+        if not record:
+            return None
+        return packed_to_datetime(struct.unpack_from("<Q", record)[0])
+
     def get_symbol_data_raw(self, symbol_name):
         binarry, errorstate, errmsg = self.__get_binarry(symbol_name)
         if errorstate:
             return []
-        data = self.__symbol.parse(binarry)
+        if self.__use_construct:
+            data = self._symbol_struct.parse(binarry)
+        else:
+            data = parse_symbol(binarry)
         if hasattr(binarry, "close"):
             binarry.close()
         return data
 
-    def get_symbol_data_dictionary(self, symbol_name):
+    def get_symbol_data_dictionary(self, symbol_name, intraday=False):
+        """Day, Month, Year, Open, High, Low, Close and Volume of
+        ``symbol_name`` as dict of lists, empty if the symbol does not exist.
+
+        :param intraday: add the time columns, see
+            :func:`ami2py.ami_arrays.date_columns`. The whole file is then
+            decoded column wise, which requires numpy.
+        """
+        if intraday:
+            return self._get_columns_dictionary(symbol_name, intraday)
         symbdata = self.get_symbol_data_raw(symbol_name)
-        if type(symbdata) == dict:
+        if not symbdata:
             return {}
         packed_map = {
             DAY: lambda x: x[DATEPACKED][DAY],
@@ -111,25 +283,26 @@ class AmiReader(AmiDbFolderLayout):
 
         return result
 
+    def _get_columns_dictionary(self, symbol_name, intraday):
+        binarry, errorstate, errmsg = self.__get_binarry(symbol_name)
+        if errorstate:
+            return {}
+        records = records_from_buffer(binarry)
+        result = date_columns(records[DATEPACKED], intraday)
+        for name in (OPEN, HIGH, LOW, CLOSE, VOLUME):
+            result[name] = records[name].tolist()
+        return result
+
     def get_symbol_data(self, symbol_name):
         binarry, errorstate, errmsg = self.__get_binarry(symbol_name)
         if errorstate == ERROR_RETURNED:
-            return SymbolData()
+            return self.symbol_data_type()
 
-        data = self.__symbol.parse(binarry)
+        if self.__use_construct:
+            parsed = self._symbol_struct.parse(binarry)
+            data = self.symbol_data_type().set_by_construct(parsed)
+        else:
+            data = self.symbol_data_type().set_by_binary(binarry)
         if hasattr(binarry, "close"):
             binarry.close()
-        values = [
-            SymbolEntry(
-                Open=el[OPEN],
-                Low=el[LOW],
-                High=el[HIGH],
-                Close=el[CLOSE],
-                Volume=el[VOLUME],
-                Day=el[DATEPACKED][DAY],
-                Month=el[DATEPACKED][MONTH],
-                Year=el[DATEPACKED][YEAR],
-            )
-            for el in data["Entries"]
-        ]
-        return SymbolData(Header=data["Header"], Entries=values)
+        return data
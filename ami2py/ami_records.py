@@ -0,0 +1,64 @@
+"""Decoding of symbol file records with the struct module.
+
+Every 40 byte record of a symbol file is a little endian 64 bit packed date
+followed by eight float32 values, which ``struct`` unpacks in one call. The
+results are the same as parsing the file with
+:data:`ami2py.ami_construct.SymbolConstruct`, without the bit level work.
+"""
+import struct
+
+from .consts import (
+    DATEPACKED,
+    CLOSE,
+    OPEN,
+    HIGH,
+    LOW,
+    VOLUME,
+    AUX_1,
+    AUX_2,
+    TERMINATOR,
+    NUM_HEADER_BYTES,
+    OVERALL_ENTRY_BYTES,
+)
+from .ami_arrays import DATE_BITFIELDS
+
+RECORD_STRUCT = struct.Struct("<Q8f")
+FLOAT_FIELDS = (CLOSE, OPEN, HIGH, LOW, VOLUME, AUX_1, AUX_2, TERMINATOR)
+
+
+def iter_records(binary):
+    """Unpack the records of a symbol file into tuples.
+
+    Like the ``GreedyRange`` of the construct definition all complete
+    records behind the header are returned.
+
+    :param binary: content of a symbol file, bytes or mmap
+    :return: iterator of (packed date, Close, Open, High, Low, Volume, AUX1,
+        AUX2, TERMINATOR) tuples
+    """
+    num_records = max(len(binary) - NUM_HEADER_BYTES, 0) // OVERALL_ENTRY_BYTES
+    end = NUM_HEADER_BYTES + num_records * OVERALL_ENTRY_BYTES
+    return RECORD_STRUCT.iter_unpack(binary[NUM_HEADER_BYTES:end])
+
+
+def unpack_date(packed):
+    """Split a packed date into the components parsed by construct."""
+    return {name: (packed >> shift) & mask for name, shift, mask in DATE_BITFIELDS}
+
+
+def parse_symbol(binary):
+    """Fast equivalent of ``SymbolConstruct.parse(binary)``.
+
+    :return: dict with the ``Header`` bytes and the ``Entries`` as dicts
+    """
+    entries = []
+    for record in iter_records(binary):
+        entry = dict(zip(FLOAT_FIELDS, record[1:]))
+        entry[DATEPACKED] = unpack_date(record[0])
+        entries.append(entry)
+    return {"Header": bytes(binary[:NUM_HEADER_BYTES]), "Entries": entries}
+
+
+def pack_records(records):
+    """Inverse of :func:`iter_records`, encode record tuples with struct."""
+    return b"".join(RECORD_STRUCT.pack(*record) for record in records)
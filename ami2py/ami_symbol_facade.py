@@ -1,13 +1,3 @@
-from construct import (
-    Struct,
-    Bytes,
-    GreedyRange,
-    PaddedString,
-    swapbitsinbytes,
-    BitsSwapped,
-    bytes2bits,
-    bits2bytes,
-)
 from .consts import (
     DATEPACKED,
     DAY,
@@ -28,13 +18,24 @@ from .consts import (
     AUX_1,
     AUX_2,
     TERMINATOR,
+    NUM_HEADER_BYTES,
+    OVERALL_ENTRY_BYTES,
+    TERMINATOR_DOUBLE_WORD_LENGTH,
+    HEADER_LENGTH_OFFSET,
 )
-from .ami_bitstructs import EntryChunk
-from .ami_construct import SymbolHeader
 from .bitparser import read_date, reverse_bits
-from .errors import InvalidAmiHeaderError
+from .errors import InvalidAmiHeaderError, ReadOnlyFacadeError
+from .ami_dates import date_to_packed, pack_date
+from .ami_records import RECORD_STRUCT
+from .ami_arrays import load_numpy, encode_columns
+import bisect
 import struct
 
+SYMBOL_MAGIC = b"BROKDAt5"
+# packed date of a record, the eight float values are skipped
+PACKED_DATE_STRUCT = struct.Struct("<Q32x")
+MAX_PACKED_DATE = 0xFFFFFFFFFFFFFFFF
+
 entry_map = [
     DAY,
     MONTH,
@@ -55,24 +56,6 @@ entry_map = [
     FUT,
 ]
 
-NUM_HEADER_BYTES = 0x4A0
-
-OVERALL_ENTRY_BYTES = 40
-
-TERMINATOR_DOUBLE_WORD_LENGTH = 4
-
-Master = Struct(
-    "Header" / Bytes(0x4A0),
-    "Symbols"
-    / GreedyRange(
-        Struct("Symbol" / PaddedString(5, "ASCII"), "Rest" / Bytes(1172 - 5))
-    ),
-)
-
-
-SymbolConstruct = Struct(
-    "Header" / Bytes(0x4A0), "Entries" / GreedyRange(BitsSwapped(EntryChunk))
-)
 
 
 class AmiSymbolFacade:
@@ -205,18 +188,140 @@ def date_to_bin(
     ...
 
 
+def entry_to_bin(other):
+    """Encode a quote dictionary into a 40 byte symbol file record."""
+    date_value = pack_date(
+        int(other[YEAR]),
+        int(other[MONTH]),
+        int(other[DAY]),
+        int(other.get(HOUR, 0)),
+        int(other.get(MINUTE, 0)),
+        int(other.get(SECOND, 0)),
+        int(other.get(MILLI_SEC, 0)),
+        int(other.get(MICRO_SEC, 0)),
+    )
+    date_value |= ((int(other.get(RESERVED, 0)) & 0x1F) << 1) | (
+        int(other.get(FUT, 0)) & 0x1
+    )
+    return RECORD_STRUCT.pack(
+        date_value,
+        other[CLOSE],
+        other[OPEN],
+        other[HIGH],
+        other[LOW],
+        other.get(VOLUME, 0),
+        other.get(AUX_1, 0),
+        other.get(AUX_2, 0),
+        other.get(TERMINATOR, 0),
+    )
+
+
+def read_entry(binentries, start):
+    """Decode the 40 byte record at ``start`` into a quote dictionary."""
+    date_tuple = binentries[start : (start + 8)]
+    return {
+        **read_date(date_tuple),
+        CLOSE: create_float(binentries[(start + 8) : (start + 12)]),
+        OPEN: create_float(binentries[(start + 12) : (start + 16)]),
+        HIGH: create_float(binentries[(start + 16) : (start + 20)]),
+        LOW: create_float(binentries[(start + 20) : (start + 24)]),
+        VOLUME: create_float(binentries[(start + 24) : (start + 28)]),
+        AUX_1: create_float(binentries[(start + 28) : (start + 32)]),
+        AUX_2: create_float(binentries[(start + 32) : (start + 36)]),
+        TERMINATOR: create_float(binentries[(start + 36) : (start + 40)]),
+    }
+
+
+def read_entries(records):
+    """Decode a buffer of consecutive 40 byte records into quote dictionaries."""
+    count = len(records) // OVERALL_ENTRY_BYTES
+    return [read_entry(records, i * OVERALL_ENTRY_BYTES) for i in range(count)]
+
+
+def _is_column(value):
+    return hasattr(value, "__len__") and not isinstance(value, (str, bytes))
+
+
+def _columns_to_rows(columns):
+    columns = {
+        k: v.tolist() if hasattr(v, "tolist") else v for k, v in columns.items()
+    }
+    lengths = {len(v) for v in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+    length = lengths.pop() if lengths else 0
+    return ({k: v[i] for k, v in columns.items()} for i in range(length))
+
+
+def entries_to_bin(data):
+    """Encode quotes into consecutive 40 byte records.
+
+    :param data: see :meth:`AmiSymbolDataFacade.extend`
+    :return: bytes of all encoded records
+    """
+    dtype = getattr(data, "dtype", None)
+    if dtype is not None and dtype.names:
+        if DATEPACKED in dtype.names:
+            from .ami_arrays import QUOTE_DTYPE
+
+            records = load_numpy().zeros(len(data), dtype=QUOTE_DTYPE)
+            for name in dtype.names:
+                if name in QUOTE_DTYPE.names:
+                    records[name] = data[name]
+            return records.tobytes()
+        return encode_columns({name: data[name] for name in dtype.names}, strict=False)
+    elif isinstance(data, dict):
+        if all(_is_column(v) for v in data.values()):
+            # an empty mapping or empty columns contain no quotes
+            if all(len(v) == 0 for v in data.values()):
+                return b""
+            if load_numpy() is not None:
+                return encode_columns(data, strict=False)
+            rows = _columns_to_rows(data)
+        else:
+            rows = [data]
+    else:
+        rows = data
+    return b"".join(entry_to_bin(row) for row in rows)
+
+
+class _PackedDateColumn:
+    """Sequence of the packed dates of a facade, used for bisecting."""
+
+    def __init__(self, facade):
+        self.facade = facade
+
+    def __len__(self):
+        return self.facade.length
+
+    def __getitem__(self, index):
+        return self.facade.packed_date(index)
+
+
 class AmiSymbolDataFacade:
-    def __init__(self, binary=None):
-        self.binary = binary
+    def __init__(self, binary=None, readonly=False):
+        """
+        :param binary: content of a symbol file, None for a new symbol
+        :param readonly: serve the quotes directly from ``binary`` (usually a
+            mmap) instead of copying them. The facade keeps a reference to
+            ``binary`` and can not be extended, see :meth:`to_writable`.
+        """
         self._empty = False
+        self._header = None
+        self._mmap = None
+        # number of leading entries known to be sorted by date
+        self._sorted_length = 0
+        self._dates_sorted = True
+        self.readonly = readonly
+        self.modified = False
+        # number of entries in the file this facade was loaded from
+        self.stored_length = 0
         self.stride = OVERALL_ENTRY_BYTES
-        self.default_header = b"BROKDAt5SPCE\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80?\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00X\x02\x00\x00"
-        self.header = SymbolHeader.parse(self.default_header)
-        self.default_header = bytearray(self.default_header)
+        default_header = b"BROKDAt5SPCE\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80?\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00X\x02\x00\x00"
+        self.default_header = bytearray(default_header)
         if not binary:
             self._empty = True
-            self.binary = self.default_header + bytearray(TERMINATOR_DOUBLE_WORD_LENGTH)
-            self.binentries = self.binary[NUM_HEADER_BYTES:]
+            self.binentries = bytearray(TERMINATOR_DOUBLE_WORD_LENGTH)
             self.length = 0
             self.set_length_in_header()
             return
@@ -224,18 +329,94 @@ class AmiSymbolDataFacade:
         enough_bytes = len(binary) >= (NUM_HEADER_BYTES + TERMINATOR_DOUBLE_WORD_LENGTH)
         if not enough_bytes:
             raise InvalidAmiHeaderError("Symbol file is too short")
-        self.binary = bytearray(self.binary)
-        self.header = SymbolHeader.parse(self.binary)
-        self.default_header = SymbolHeader.build(self.header)
+        if bytes(binary[:8]) != SYMBOL_MAGIC:
+            raise InvalidAmiHeaderError("Symbol file header is invalid")
+        # the header is parsed on first access of header, until then the
+        # bytes of the file are kept unchanged
+        self.default_header = bytearray(binary[:NUM_HEADER_BYTES])
+        if readonly:
+            self._mmap = binary
+            view = memoryview(binary)
+            self.binentries = view[NUM_HEADER_BYTES:]
+            self.length = (
+                len(self.binentries) - TERMINATOR_DOUBLE_WORD_LENGTH
+            ) // OVERALL_ENTRY_BYTES
+            self.stored_length = self.length
+            return
         self.binentries = bytearray(binary[NUM_HEADER_BYTES:])
         self.length = (
             len(self.binentries) - TERMINATOR_DOUBLE_WORD_LENGTH
         ) // OVERALL_ENTRY_BYTES
+        self.stored_length = self.length
         self.set_length_in_header()
 
+    @property
+    def header(self):
+        if self._header is None:
+            from .ami_construct import SymbolHeader
+
+            self._header = SymbolHeader.parse(self.default_header)
+        return self._header
+
+    @header.setter
+    def header(self, value):
+        self._header = value
+
+    def to_writable(self):
+        """Return a writable copy of a read only facade."""
+        if not self.readonly:
+            return self
+        return AmiSymbolDataFacade(bytes(self.binary))
+
+    def close(self):
+        """Release the memory map of a read only facade.
+
+        The map stays open while views of the facade data are still in use.
+        """
+        if self._mmap is None:
+            return
+        try:
+            self.binentries.release()
+        except BufferError:
+            return
+        self.binentries = bytearray(TERMINATOR_DOUBLE_WORD_LENGTH)
+        self.length = self.stored_length = 0
+        self._empty = True
+        self._sorted_length = 0
+        self._dates_sorted = True
+        try:
+            self._mmap.close()
+        except (AttributeError, BufferError):
+            pass
+        self._mmap = None
+
+    @property
+    def binary(self):
+        """Complete symbol file content, header followed by the entries."""
+        return self.default_header + self.binentries
+
+    def appended_binary(self):
+        """Entries added since the last store, followed by the terminator.
+
+        Writing these bytes at the position of the old terminator and patching
+        the length in the header turns the stored file into :attr:`binary`.
+        """
+        return self.binentries[self.stored_length * OVERALL_ENTRY_BYTES :]
+
+    def mark_stored(self):
+        """Record that the current content has been written to disk."""
+        self.stored_length = self.length
+        self.modified = False
+
     def set_length_in_header(self):
-        self.header["Length"] = self.length
-        self.default_header = SymbolHeader.build(self.header)
+        if self._header is not None:
+            # apply changes made to the parsed header as well
+            from .ami_construct import SymbolHeader
+
+            self._header["Length"] = self.length
+            self.default_header = bytearray(SymbolHeader.build(self._header))
+            return
+        struct.pack_into("<I", self.default_header, HEADER_LENGTH_OFFSET, self.length)
         # self.default_header[-4] = self.length & 0x00ff
         # self.default_header[-3] = (self.length & 0xff00) >> 8
         # self.default_header[-2] = (self.length & 0xff0000) >> 16
@@ -271,92 +452,212 @@ class AmiSymbolDataFacade:
         index = item
         if item < 0:
             index = self.length + item
-        start = index * self.stride
-        date_tuple = self.binentries[start : (start + 8)]
-        return {
-            **read_date(date_tuple),
-            CLOSE: create_float(self.binentries[(start + 8) : (start + 12)]),
-            OPEN: create_float(self.binentries[(start + 12) : (start + 16)]),
-            HIGH: create_float(self.binentries[(start + 16) : (start + 20)]),
-            LOW: create_float(self.binentries[(start + 20) : (start + 24)]),
-            VOLUME: create_float(self.binentries[(start + 24) : (start + 28)]),
-            AUX_1: create_float(self.binentries[(start + 28) : (start + 32)]),
-            AUX_2: create_float(self.binentries[(start + 32) : (start + 36)]),
-            TERMINATOR: create_float(self.binentries[(start + 36) : (start + 40)]),
-        }
+        return read_entry(self.binentries, index * self.stride)
 
     def __iter__(self):
         for i in range(self.length):
             yield self._get_item_by_index(i)
 
-    def __iadd__(self, other):
-        # assert all (k in entry_map for k in other)
-        minute = other.get(MINUTE, 0)
-        hour = other.get(HOUR, 0)
-        second = other.get(SECOND, 0)
-        micro_second = other.get(MICRO_SEC, 0)
-        milli_second = other.get(MILLI_SEC, 0)
-        reserved = other.get(RESERVED, 0)
-        fut = other.get(FUT, 0)
-
-        append_bin = bytearray(OVERALL_ENTRY_BYTES)
-
-        date_value = (
-            ((other[YEAR] & 0xFFF) << 52)
-            | ((other[MONTH] & 0xF) << 48)
-            | ((other[DAY] & 0x1F) << 43)
-            | ((hour & 0x1F) << 38)
-            | ((minute & 0x3F) << 32)
-            | ((second & 0x3F) << 26)
-            | ((milli_second & 0x3FF) << 16)
-            | ((micro_second & 0x3FF) << 6)
-            | ((reserved & 0x7) << 1)
-            | (fut & 0x1)
+    def tail_records(self, n):
+        """Encoded records of the last ``n`` entries."""
+        n = max(0, min(n, self.length))
+        return bytes(
+            self.binentries[
+                (self.length - n) * self.stride : self.length * self.stride
+            ]
         )
-        struct.pack_into("<Q", append_bin, 0, date_value)
-
-        struct.pack_into("<f", append_bin, 8, other[CLOSE])
-        struct.pack_into("<f", append_bin, 12, other[OPEN])
-        struct.pack_into("<f", append_bin, 16, other[HIGH])
-        struct.pack_into("<f", append_bin, 20, other[LOW])
-        struct.pack_into("<f", append_bin, 24, other.get(VOLUME, 0))
-        struct.pack_into("<f", append_bin, 28, other.get(AUX_1, 0))
-        struct.pack_into("<f", append_bin, 32, other.get(AUX_2, 0))
-        struct.pack_into("<f", append_bin, 36, other.get(TERMINATOR, 0))
+
+    def packed_date(self, index):
+        """Packed 64 bit date of the entry at ``index``."""
+        return struct.unpack_from("<Q", self.binentries, index * self.stride)[0]
+
+    def packed_dates(self, start=0):
+        """Packed dates of the entries from index ``start`` on."""
+        view = memoryview(self.binentries)[
+            start * self.stride : self.length * self.stride
+        ]
+        try:
+            return [packed for (packed,) in PACKED_DATE_STRUCT.iter_unpack(view)]
+        finally:
+            view.release()
+
+    def dates_sorted(self):
+        """True if the packed dates of the entries never decrease.
+
+        Symbol files are usually sorted, but not always. The dates are checked
+        once, later calls only check the entries appended in between.
+        """
+        if self._dates_sorted and self._sorted_length < self.length:
+            dates = self.packed_dates(max(self._sorted_length - 1, 0))
+            self._dates_sorted = dates == sorted(dates)
+            self._sorted_length = self.length
+        return self._dates_sorted
+
+    def index_range(self, start=None, end=None):
+        """Binary search the entries between ``start`` and ``end``.
+
+        Requires sorted dates, see :meth:`dates_sorted`.
+
+        :param start: first date (inclusive), None for the first entry
+        :param end: last date (inclusive), None for the last entry
+        :return: tuple of first index and index behind the last match
+        :raises ValueError: if the dates are not sorted
+        """
+        if not self.dates_sorted():
+            raise ValueError("The dates are not sorted, use get_range")
+        dates = _PackedDateColumn(self)
+        low = 0
+        high = self.length
+        if start is not None:
+            low = bisect.bisect_left(dates, date_to_packed(start))
+        if end is not None:
+            high = bisect.bisect_right(dates, date_to_packed(end, end=True), low)
+        return low, max(low, high)
+
+    def indices(self, start=None, end=None):
+        """Indices of the entries dated between ``start`` and ``end``.
+
+        Sorted dates are binary searched, otherwise all dates are compared.
+        """
+        if self.dates_sorted():
+            return range(*self.index_range(start, end))
+        low = 0 if start is None else date_to_packed(start)
+        high = MAX_PACKED_DATE if end is None else date_to_packed(end, end=True)
+        return [
+            index
+            for index, packed in enumerate(self.packed_dates())
+            if low <= packed <= high
+        ]
+
+    def get_range(self, start=None, end=None):
+        """Return the entries dated between ``start`` and ``end`` (inclusive).
+
+        Dates can be ``datetime.date`` (whole days), ``datetime.datetime``
+        or packed integers. Only the matching entries are decoded, they are
+        returned in the order of the file.
+        """
+        return [self._get_item_by_index(i) for i in self.indices(start, end)]
+
+    def at(self, date):
+        """Return the first entry at ``date``, for a ``datetime.date`` the
+        first entry of that day.
+
+        :raises KeyError: if there is no entry at ``date``
+        """
+        indices = self.indices(date, date)
+        if not indices:
+            raise KeyError(date)
+        return self._get_item_by_index(indices[0])
+
+    def to_numpy(self):
+        """Return a copy of all quote records as a NumPy structured array."""
+        from .ami_arrays import records_from_buffer
+
+        return records_from_buffer(self.binentries, offset=0).copy()
+
+    def __iadd__(self, other):
+        return self.extend([other])
+
+    def extend(self, data):
+        """Append many quotes at once.
+
+        All entries are encoded into one buffer which is spliced in front of
+        the terminator, the length in the header is patched only once.
+
+        :param data: list of quote dictionaries, a dictionary of equally long
+            columns (lists or arrays), a single quote dictionary or a NumPy
+            structured array
+        :return: self
+        """
+        return self.extend_records(entries_to_bin(data))
+
+    def extend_records(self, records):
+        """Append already encoded 40 byte records.
+
+        :param records: bytes like object, e.g. from
+            :func:`ami2py.ami_arrays.encode_columns`
+        :return: self
+        """
+        if self.readonly:
+            raise ReadOnlyFacadeError(
+                "Read only symbol data can not be extended, use to_writable()"
+            )
+        if len(records) % OVERALL_ENTRY_BYTES:
+            raise ValueError("Records must be a multiple of 40 bytes")
         self.binentries[
             -TERMINATOR_DOUBLE_WORD_LENGTH:-TERMINATOR_DOUBLE_WORD_LENGTH
-        ] = append_bin
+        ] = records
+        self._empty = self._empty and len(records) == 0
+        self.modified = self.modified or len(records) > 0
+        self._update_length()
+        return self
+
+    def _update_length(self):
         self.length = (
             len(self.binentries) - TERMINATOR_DOUBLE_WORD_LENGTH
         ) // OVERALL_ENTRY_BYTES
-        self.set_length_in_header()
-        self.binary = self.default_header + self.binentries
-        return self
+        if self._header is not None:
+            self._header["Length"] = self.length
+        struct.pack_into("<I", self.default_header, HEADER_LENGTH_OFFSET, self.length)
 
 
-class SymbolConstructFast:
-    header = "Header" / Bytes(0x4A0)
-    entry_chunk = BitsSwapped(EntryChunk)
-
-    @classmethod
-    def parse(self, bin):
-        binentries = bin[0x4A0:]
-        num_bytes = len(binentries)
-        numits, offset = divmod(num_bytes, 0x488)  # bytes
-        result = {}
-        result["Header"] = self.header.parse(bin[0:0x4A0])
-        result["Entries"] = []
-        start = 0x4A0 - offset
-        numits = numits + 1
-        result["Entries"].append(self.entry_chunk.parse(bin[0x4A0:]))
-        entrybin = bin[start:]
-        for i in range(numits):
-            entries = []
-            for offset_index in range(30):
-                start_index = offset_index * i * 40
-                entries.append(
-                    self.entry_chunk.parse(entrybin[start_index : start_index + 40])
-                )
-            result["Entries"].append(entries)
+_CONSTRUCT_NAMES = ("Master", "SymbolConstruct", "SymbolConstructFast")
 
-        return result
+
+def _build_construct_structs():
+    """Construct based definitions, built on first access so that the facade
+    can be used without importing construct."""
+    from construct import Struct, Bytes, GreedyRange, PaddedString, BitsSwapped
+    from .ami_bitstructs import EntryChunk
+
+    Master = Struct(
+        "Header" / Bytes(0x4A0),
+        "Symbols"
+        / GreedyRange(
+            Struct("Symbol" / PaddedString(5, "ASCII"), "Rest" / Bytes(1172 - 5))
+        ),
+    )
+
+    SymbolConstruct = Struct(
+        "Header" / Bytes(0x4A0), "Entries" / GreedyRange(BitsSwapped(EntryChunk))
+    )
+
+    class SymbolConstructFast:
+        header = "Header" / Bytes(0x4A0)
+        entry_chunk = BitsSwapped(EntryChunk)
+
+        @classmethod
+        def parse(self, bin):
+            binentries = bin[0x4A0:]
+            num_bytes = len(binentries)
+            numits, offset = divmod(num_bytes, 0x488)  # bytes
+            result = {}
+            result["Header"] = self.header.parse(bin[0:0x4A0])
+            result["Entries"] = []
+            start = 0x4A0 - offset
+            numits = numits + 1
+            result["Entries"].append(self.entry_chunk.parse(bin[0x4A0:]))
+            entrybin = bin[start:]
+            for i in range(numits):
+                entries = []
+                for offset_index in range(30):
+                    start_index = offset_index * i * 40
+                    entries.append(
+                        self.entry_chunk.parse(entrybin[start_index : start_index + 40])
+                    )
+                result["Entries"].append(entries)
+
+            return result
+
+    return {
+        "Master": Master,
+        "SymbolConstruct": SymbolConstruct,
+        "SymbolConstructFast": SymbolConstructFast,
+    }
+
+
+def __getattr__(name):
+    if name in _CONSTRUCT_NAMES:
+        globals().update(_build_construct_structs())
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,4 +16,18 @@ MICRO_SEC = "MicroSec"
 MILLI_SEC = "MilliSec"
 SECOND = "Second"
 HOUR = "Hour"
-MINUTE = "Minute"
\ No newline at end of file
+MINUTE = "Minute"
+# microseconds since 1970-01-01, see ami_arrays.date_columns
+EPOCH_MICRO_SEC = "EpochMicroSec"
+
+NUM_HEADER_BYTES = 0x4A0
+OVERALL_ENTRY_BYTES = 40
+TERMINATOR_DOUBLE_WORD_LENGTH = 4
+# position of the number of entries in the symbol file header
+HEADER_LENGTH_OFFSET = NUM_HEADER_BYTES - 4
+
+# broker.master: 8 byte header and the number of symbols followed by records
+MASTER_HEADER_BYTES = 12
+MASTER_ENTRY_BYTES = 1172
+MASTER_SYMBOL_BYTES = 492
+MASTER_CONST = b"\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\x3F"
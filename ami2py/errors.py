@@ -1,3 +1,11 @@
 class InvalidAmiHeaderError(Exception):
     """Raised when an AmiBroker symbol file header is invalid."""
 
+
+
+class ReadOnlyFacadeError(Exception):
+    """Raised when a read only AmiSymbolDataFacade is modified."""
+
+
+class JournalError(Exception):
+    """Raised when a batch of writes can not be committed."""
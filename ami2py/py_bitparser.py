@@ -27,7 +27,7 @@ def read_date(date_tuple):
         SECOND: (values >> 26) & 0x3F,
         MILLI_SEC: (values >> 16) & 0x3FF,
         MICRO_SEC: (values >> 6) & 0x3FF,
-        RESERVED: values & 0xE,
+        RESERVED: (values >> 1) & 0x1F,
         FUT: values & 0x1,
     }
 
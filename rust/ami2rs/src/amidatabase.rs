@@ -57,6 +57,15 @@ impl AmiDataBase {
         self.reader.read_quotes(symbol)
     }
 
+    pub fn list_quotes_range(
+        &self,
+        symbol: &str,
+        start: Option<(u16, u8, u8)>,
+        end: Option<(u16, u8, u8)>,
+    ) -> std::io::Result<Vec<Quote>> {
+        self.reader.read_quotes_range(symbol, start, end)
+    }
+
     pub fn add_quotes(&self, symbol: &str, quotes: &[Quote]) -> std::io::Result<()> {
         self.reader.append_quotes(symbol, quotes)
     }
@@ -1,5 +1,5 @@
 use std::fs::{self, OpenOptions};
-use std::io::Write;
+use std::io::{Read, Seek, SeekFrom, Write};
 use std::path::Path;
 
 #[derive(Debug)]
@@ -58,9 +58,68 @@ impl AmiReader {
         Ok(parse_symbol_entries(&data[SYMBOL_HEADER_SIZE..]))
     }
 
+    /// Quotes dated between `start` and `end` (inclusive) in file order.
+    /// Sorted packed dates are binary searched, unsorted files are scanned;
+    /// only the matching records are decoded.
+    pub fn read_quotes_range(
+        &self,
+        symbol: &str,
+        start: Option<(u16, u8, u8)>,
+        end: Option<(u16, u8, u8)>,
+    ) -> std::io::Result<Vec<Quote>> {
+        let data = self.read_symbol_bytes(symbol)?;
+        if data.len() < SYMBOL_HEADER_SIZE {
+            return Ok(Vec::new());
+        }
+        let entries = &data[SYMBOL_HEADER_SIZE..];
+        let count = entries.len().saturating_sub(TERMINATOR_SIZE) / SYMBOL_ENTRY_SIZE;
+        if !dates_sorted(entries, count) {
+            let low = start.map_or(0, |(y, m, d)| pack_date(y, m, d));
+            let high = end.map_or(u64::MAX, |(y, m, d)| pack_date(y, m, d) | DATE_TIME_BITS);
+            let mut quotes = Vec::new();
+            for index in 0..count {
+                let packed = packed_date_at(entries, index);
+                if low <= packed && packed <= high {
+                    let offset = index * SYMBOL_ENTRY_SIZE;
+                    quotes.extend(parse_symbol_entries(&entries[offset..offset + SYMBOL_ENTRY_SIZE]));
+                }
+            }
+            return Ok(quotes);
+        }
+        let low = match start {
+            Some((y, m, d)) => {
+                let key = pack_date(y, m, d);
+                partition_dates(entries, 0, count, |v| v < key)
+            }
+            None => 0,
+        };
+        let high = match end {
+            Some((y, m, d)) => {
+                let key = pack_date(y, m, d) | DATE_TIME_BITS;
+                partition_dates(entries, low, count, |v| v <= key)
+            }
+            None => count,
+        };
+        let high = high.max(low);
+        Ok(parse_symbol_entries(&entries[low * SYMBOL_ENTRY_SIZE..high * SYMBOL_ENTRY_SIZE]))
+    }
+
+    /// Date of the last quote, only the last record of the file is read.
     pub fn last_time_stamp(&self, symbol: &str) -> std::io::Result<Option<(u16, u8, u8)>> {
-        let quotes = self.read_quotes(symbol)?;
-        Ok(quotes.last().map(|q| (q.year, q.month, q.day)))
+        let p = symbol_path(&self.folder, symbol);
+        let mut file = fs::File::open(p)?;
+        let size = file.metadata()?.len() as usize;
+        let count = size.saturating_sub(SYMBOL_HEADER_SIZE) / SYMBOL_ENTRY_SIZE;
+        if count == 0 {
+            return Ok(None);
+        }
+        let offset = SYMBOL_HEADER_SIZE + (count - 1) * SYMBOL_ENTRY_SIZE;
+        file.seek(SeekFrom::Start(offset as u64))?;
+        let mut record = [0u8; SYMBOL_ENTRY_SIZE];
+        file.read_exact(&mut record)?;
+        Ok(parse_symbol_entries(&record)
+            .last()
+            .map(|q| (q.year, q.month, q.day)))
     }
 
     pub fn append_quotes(&self, symbol: &str, quotes: &[Quote]) -> std::io::Result<()> {
@@ -75,6 +134,37 @@ impl AmiReader {
 }
 
 const MASTER_ENTRY_SIZE: usize = 1172;
+const TERMINATOR_SIZE: usize = 4;
+// hour, minute, second, milli-, microseconds and flags below the day bits
+const DATE_TIME_BITS: u64 = (1 << 43) - 1;
+
+fn pack_date(year: u16, month: u8, day: u8) -> u64 {
+    ((year as u64) << 52) | ((month as u64) << 48) | ((day as u64) << 43)
+}
+
+fn packed_date_at(entries: &[u8], index: usize) -> u64 {
+    let offset = index * SYMBOL_ENTRY_SIZE;
+    u64::from_le_bytes(entries[offset..offset + 8].try_into().unwrap())
+}
+
+/// True if the packed dates of the first `count` records never decrease.
+fn dates_sorted(entries: &[u8], count: usize) -> bool {
+    (1..count).all(|index| packed_date_at(entries, index - 1) <= packed_date_at(entries, index))
+}
+
+/// First index in `low..high` whose packed date does not satisfy `before`,
+/// the packed dates of the records have to be sorted.
+fn partition_dates(entries: &[u8], mut low: usize, mut high: usize, before: impl Fn(u64) -> bool) -> usize {
+    while low < high {
+        let mid = low + (high - low) / 2;
+        if before(packed_date_at(entries, mid)) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    low
+}
 
 fn parse_symbol_entries(data: &[u8]) -> Vec<Quote> {
     let mut entries = Vec::new();
@@ -90,7 +180,7 @@ fn parse_symbol_entries(data: &[u8]) -> Vec<Quote> {
         let second = ((val >> 26) & 0x3F) as u8;
         let milli_sec = ((val >> 16) & 0x3FF) as u16;
         let micro_sec = ((val >> 6) & 0x3FF) as u16;
-        let reserved = ((val & 0xE) >> 1) as u8;
+        let reserved = ((val >> 1) & 0x1F) as u8;
         let future = (val & 0x1) as u8;
         let close = f32::from_le_bytes(chunk[8..12].try_into().unwrap());
         let open = f32::from_le_bytes(chunk[12..16].try_into().unwrap());
@@ -163,3 +253,36 @@ fn symbol_path(root: &str, symbol: &str) -> String {
         Path::new(root).join(folder).join(symbol).to_string_lossy().into_owned()
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn test_db() -> String {
+        Path::new(env!("CARGO_MANIFEST_DIR"))
+            .join("../../tests/TestDB")
+            .to_string_lossy()
+            .into_owned()
+    }
+
+    #[test]
+    fn read_quotes_range_of_unsorted_symbol() {
+        // @ES_C is not sorted, 2015-09-28 is followed by 2015-05-05
+        let reader = AmiReader::new(&test_db()).unwrap();
+        let quotes = reader
+            .read_quotes_range("@ES_C", Some((2015, 6, 1)), Some((2015, 6, 30)))
+            .unwrap();
+        assert_eq!(quotes.len(), 44);
+        assert!(quotes.iter().all(|q| q.year == 2015 && q.month == 6));
+    }
+
+    #[test]
+    fn read_quotes_range_of_sorted_symbol() {
+        let reader = AmiReader::new(&test_db()).unwrap();
+        let quotes = reader
+            .read_quotes_range("^GDAXI", Some((2000, 1, 1)), Some((2000, 1, 31)))
+            .unwrap();
+        assert_eq!(quotes.len(), 21);
+        assert_eq!((quotes[0].month, quotes[0].day), (1, 3));
+    }
+}
@@ -30,7 +30,7 @@ pub fn read_date(bytes: &[u8]) -> Option<Date> {
         second: ((value >> 26) & 0x3F) as u8,
         milli_sec: ((value >> 16) & 0x3FF) as u16,
         micro_sec: ((value >> 6) & 0x3FF) as u16,
-        reserved: ((value & 0xE) >> 1) as u8,
+        reserved: ((value >> 1) & 0x1F) as u8,
         is_future: (value & 0x1) as u8,
     })
 }
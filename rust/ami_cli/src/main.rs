@@ -45,18 +45,15 @@ fn main() {
         "list-quotes" => {
             if args.len() != 4 && args.len() != 8 { usage(); return; }
             let db = AmiDataBase::new(&args[2]).expect("open db");
-            let quotes = db.list_quotes(&args[3]).expect("read symbol");
             let mut start = None;
             let mut end = None;
             if args.len() == 8 {
                 if args[4] == "start" { start = parse_date(&args[5]); }
                 if args[6] == "end" { end = parse_date(&args[7]); }
             }
+            let quotes = db.list_quotes_range(&args[3], start, end).expect("read symbol");
             for q in &quotes {
-                let val = q.year as i32 * 10000 + q.month as i32 * 100 + q.day as i32;
-                if start.map_or(true, |s| val >= s) && end.map_or(true, |e| val <= e) {
-                    println!("{:04}-{:02}-{:02},{},{},{},{},{}", q.year, q.month, q.day, q.open, q.high, q.low, q.close, q.volume);
-                }
+                println!("{:04}-{:02}-{:02},{},{},{},{},{}", q.year, q.month, q.day, q.open, q.high, q.low, q.close, q.volume);
             }
         }
         "add-quotes" => {
@@ -68,11 +65,11 @@ fn main() {
     }
 }
 
-fn parse_date(s: &str) -> Option<i32> {
+fn parse_date(s: &str) -> Option<(u16, u8, u8)> {
     let parts: Vec<&str> = s.split('-').collect();
     if parts.len() != 3 { return None; }
-    let y: i32 = parts[0].parse().ok()?;
-    let m: i32 = parts[1].parse().ok()?;
-    let d: i32 = parts[2].parse().ok()?;
-    Some(y * 10000 + m * 100 + d)
+    let y: u16 = parts[0].parse().ok()?;
+    let m: u8 = parts[1].parse().ok()?;
+    let d: u8 = parts[2].parse().ok()?;
+    Some((y, m, d))
 }
@@ -5,17 +5,15 @@ from pathlib import Path
 import pandas as pd
 import yfinance as yf
 
-from ami2py import AmiDataBase, SymbolEntry
+from ami2py import AmiDataBase
 
 
 def get_last_date(db: AmiDataBase, symbol: str) -> date:
-    data = db.get_dict_for_symbol(symbol)
-    if len(data["Day"]) == 0:
+    last = db.get_last_timestamp(symbol)
+    if last is None:
         # no data, download all available history
         return date.today() - timedelta(days=365 * 50)
-    return date(
-        data["Year"][-1], data["Month"][-1], data["Day"][-1]
-    )
+    return last.date()
 
 
 def download_symbol(symbol: str, start_date: date) -> pd.DataFrame:
@@ -24,18 +22,10 @@ def download_symbol(symbol: str, start_date: date) -> pd.DataFrame:
 
 
 def append_data(db: AmiDataBase, symbol: str, df: pd.DataFrame):
-    for ts, row in df.iterrows():
-        entry = SymbolEntry(
-            Day=ts.day,
-            Month=ts.month,
-            Year=ts.year,
-            Close=float(row["Close"]),
-            High=float(row["High"]),
-            Low=float(row["Low"]),
-            Open=float(row["Open"]),
-            Volume=float(row["Volume"]),
-        )
-        db.append_symbol_entry(symbol, entry)
+    if isinstance(df.columns, pd.MultiIndex):
+        # newer yfinance versions add the ticker as second column level
+        df = df.droplevel(1, axis=1)
+    db.from_pandas(symbol, df[["Open", "High", "Low", "Close", "Volume"]])
 
 
 def update_database(db_path: Path):
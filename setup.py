@@ -74,6 +74,11 @@ setup(
         'construct==2.10.67',
         'dataclass-type-validator'
     ],
+    extras_require={
+        "numpy": ["numpy"],
+        "pandas": ["numpy", "pandas"],
+        "arrow": ["numpy", "pyarrow"],
+    },
     # Install the compiled CLI alongside the Python package if it was built
     scripts=[AMI_CLI_BIN] if os.path.exists(AMI_CLI_BIN) else [],
 )
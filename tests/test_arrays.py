@@ -0,0 +1,480 @@
+import os
+import pytest
+
+from ami2py.ami_symbol_facade import AmiSymbolDataFacade
+
+np = pytest.importorskip("numpy")
+
+test_data_folder = os.path.dirname(__file__)
+
+
+def test_records_from_buffer_matches_facade(symbol_spce):
+    from ami2py.ami_arrays import records_from_buffer, QUOTE_DTYPE
+
+    records = records_from_buffer(symbol_spce)
+    facade = AmiSymbolDataFacade(symbol_spce)
+    assert records.dtype == QUOTE_DTYPE
+    assert len(records) == facade.length == 600
+    for index in (0, 1, 299, -1):
+        row = facade[index]
+        assert records["Close"][index] == np.float32(row["Close"])
+        assert records["Open"][index] == np.float32(row["Open"])
+        assert records["High"][index] == np.float32(row["High"])
+        assert records["Low"][index] == np.float32(row["Low"])
+        assert records["Volume"][index] == np.float32(row["Volume"])
+
+
+def test_records_from_buffer_empty():
+    from ami2py.ami_arrays import records_from_buffer
+
+    assert len(records_from_buffer(b"")) == 0
+    assert len(AmiSymbolDataFacade().to_numpy()) == 0
+
+
+def test_reader_get_symbol_array():
+    from ami2py.ami_reader import AmiReader
+
+    reader = AmiReader(os.path.join(test_data_folder, "TestData"))
+    records = reader.get_symbol_array("SPCE")
+    assert len(records) == 600
+    assert not records.flags.writeable
+    assert round(float(records["Close"][-1]), 2) == 37.35
+    assert len(reader.get_symbol_array("AAPL")) == 0
+
+
+def test_decode_dates_matches_read_date(symbol_spce):
+    from ami2py.ami_arrays import records_from_buffer, decode_dates
+
+    records = records_from_buffer(symbol_spce)
+    facade = AmiSymbolDataFacade(symbol_spce)
+    dates, parts = decode_dates(records["DatePacked"], components=True)
+    assert dates.dtype == np.dtype("datetime64[us]")
+    assert dates[0] == np.datetime64("2017-09-29")
+    assert dates[-1] == np.datetime64("2020-02-19")
+    for index in (0, 10, -1):
+        row = facade[index]
+        for key in ("Year", "Month", "Day", "Hour", "Minute", "Second"):
+            assert parts[key][index] == row[key]
+
+
+def test_decode_dates_intraday():
+    from ami2py.ami_arrays import decode_dates
+    from ami2py.py_bitparser import date_to_bin
+
+    packed = [
+        int.from_bytes(date_to_bin(1, 2, 2021, 9, 30, 15, 7, 250), "little"),
+        int.from_bytes(date_to_bin(31, 12, 1999, 23, 59, 59), "little"),
+    ]
+    dates = decode_dates(np.array(packed, dtype=np.uint64))
+    assert dates[0] == np.datetime64("2021-02-01T09:30:15.250007")
+    assert dates[1] == np.datetime64("1999-12-31T23:59:59")
+
+
+def test_read_date_reserved_matches_decode_date_components():
+    from ami2py.ami_arrays import decode_date_components
+    from ami2py.py_bitparser import read_date
+
+    packed = (2021 << 52) | (2 << 48) | (1 << 43) | (0b10110 << 1) | 1
+    parts = read_date(packed.to_bytes(8, "little"))
+    assert parts["Reserved"] == 0b10110
+    assert parts["Isfut"] == 1
+    decoded = decode_date_components([packed])
+    assert {name: int(values[0]) for name, values in decoded.items()} == parts
+
+
+def test_facade_extend_with_structured_array(symbol_spce):
+    records = AmiSymbolDataFacade(symbol_spce).to_numpy()
+    facade = AmiSymbolDataFacade()
+    facade.extend(records)
+    assert facade.length == 600
+    assert facade.binentries == bytearray(symbol_spce[0x4A0:])
+
+
+def test_encode_columns_matches_entry_encoder():
+    from ami2py.ami_arrays import encode_columns
+    from ami2py.ami_symbol_facade import entries_to_bin
+
+    columns = {
+        "Year": np.array([2020, 2021]),
+        "Month": [1, 12],
+        "Day": [3, 31],
+        "Hour": [9, 23],
+        "Minute": [5, 59],
+        "Second": [1, 59],
+        "MilliSec": [3, 999],
+        "MicroSec": [5, 999],
+        "Isfut": [0, 1],
+        "Close": [1.5, 2.5],
+        "Open": [1, 2],
+        "High": np.array([3.0, 4.0], dtype=np.float32),
+        "Low": [0.5, 0.25],
+        "Volume": [10, 20],
+    }
+    rows = [{k: v[i] for k, v in columns.items()} for i in range(2)]
+    assert encode_columns(columns) == entries_to_bin(rows)
+    assert encode_columns({k: v[:0] for k, v in columns.items()}) == b""
+
+
+@pytest.mark.parametrize(
+    "change, error",
+    [
+        ({"Year": [2020.0, 2021.0]}, TypeError),
+        ({"Close": ["a", "b"]}, TypeError),
+        ({"Close": [1.0]}, ValueError),
+        ({"Foo": [1, 2]}, ValueError),
+        ({"Day": [[1], [2]]}, ValueError),
+    ],
+)
+def test_encode_columns_validates_columns(change, error):
+    from ami2py.ami_arrays import encode_columns
+
+    columns = {
+        "Year": [2020, 2021],
+        "Month": [1, 2],
+        "Day": [3, 4],
+        "Close": [1.0, 2.0],
+        "Open": [1.0, 2.0],
+        "High": [1.0, 2.0],
+        "Low": [1.0, 2.0],
+    }
+    columns.update(change)
+    with pytest.raises(error):
+        encode_columns(columns)
+    del columns["Low"]
+    with pytest.raises(ValueError):
+        encode_columns(columns)
+
+
+def test_database_append_columns(index_db):
+    from ami2py import AmiDataBase
+
+    db = AmiDataBase(index_db)
+    length = db.get_fast_symbol_data("^GDAXI").length
+    db.append_columns(
+        "^GDAXI",
+        Year=np.full(3, 2030),
+        Month=np.ones(3, dtype=np.int8),
+        Day=np.arange(1, 4),
+        Close=np.linspace(1, 2, 3),
+        Open=[1.0, 1.0, 1.0],
+        High=[2.0, 2.0, 2.0],
+        Low=[0.5, 0.5, 0.5],
+    )
+    facade = db.get_fast_symbol_data("^GDAXI")
+    assert facade.length == length + 3
+    assert facade.modified
+    assert [facade[-i]["Day"] for i in (3, 2, 1)] == [1, 2, 3]
+    assert facade[-1]["Close"] == 2.0
+
+
+def test_database_iter_chunks(index_db):
+    from ami2py import AmiDataBase
+
+    db = AmiDataBase(index_db)
+    symbols = ["^GDAXI", "@ES_C", "MISSING"]
+    chunks = [
+        (symbol, chunk.copy())
+        for symbol, chunk in db.iter_chunks(symbols, max_resident_bytes=1000 * 40)
+    ]
+    assert {symbol for symbol, _ in chunks} == {"^GDAXI", "@ES_C"}
+    assert all(len(chunk) <= 1000 for _, chunk in chunks)
+    for symbol in ("^GDAXI", "@ES_C"):
+        joined = np.concatenate([chunk for s, chunk in chunks if s == symbol])
+        assert (joined == db.get_symbol_array(symbol)).all()
+
+    records = [
+        chunk for _, chunk in db.iter_chunks(["@ES_C"], chunk_size=3000, kind="records")
+    ]
+    assert [len(chunk) for chunk in records] == [3000, 157]
+    assert records[1][-1][1] == float(db.get_symbol_array("@ES_C")["Close"][-1])
+
+
+def test_iter_chunks_keeps_referenced_chunk_valid(index_db):
+    from ami2py import AmiReader
+
+    reader = AmiReader(index_db)
+    chunks = list(reader.iter_chunks("^GDAXI", chunk_size=2000))
+    assert [len(chunk) for chunk in chunks] == [2000, 1542]
+    assert chunks[0][0] == reader.get_symbol_array("^GDAXI")[0]
+
+
+def test_database_to_pandas_and_from_pandas(tmp_path):
+    import shutil
+
+    pd = pytest.importorskip("pandas")
+    from ami2py import AmiDataBase
+    from ami2py.consts import MICRO_SEC
+
+    db_path = tmp_path / "Pandas"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path)
+    frame = db.to_pandas("^GDAXI")
+    data = db.get_dict_for_symbol("^GDAXI")
+    assert isinstance(frame.index, pd.DatetimeIndex)
+    assert len(frame) == len(data["Close"]) == 3542
+    assert list(frame.index.year) == data["Year"]
+    assert list(frame.index.day) == data["Day"]
+    assert frame["Close"].tolist() == data["Close"]
+
+    intraday = pd.DataFrame(
+        {"Open": [1.0, 2.0], "High": [3.0, 4.0], "Low": [0.5, 1.5],
+         "Close": [2.5, 3.5], "Volume": [10.0, 20.0], "Adj Close": [0.0, 0.0]},
+        index=pd.DatetimeIndex(["2030-01-02 09:30:00", "2030-01-02 09:31:05.002003"]),
+    )
+    db.from_pandas("NEW", intraday)
+    db.from_pandas("^GDAXI", frame.iloc[-2:])
+    db.write_database()
+
+    db = AmiDataBase(db_path)
+    assert "NEW" in db.get_symbols()
+    new = db.to_pandas("NEW", columns=["Open", "Close"])
+    assert list(new.columns) == ["Open", "Close"]
+    assert new.index.equals(intraday.index.rename("Date"))
+    assert new["Close"].tolist() == [2.5, 3.5]
+    assert db.get_fast_symbol_data("NEW")[1][MICRO_SEC] == 3
+    gdaxi = db.to_pandas("^GDAXI")
+    assert len(gdaxi) == 3544
+    assert gdaxi.iloc[-2:].equals(frame.iloc[-2:])
+
+
+def test_database_pandas_round_trip_keeps_eod_quotes(tmp_path):
+    import shutil
+
+    pytest.importorskip("pandas")
+    from ami2py import AmiDataBase
+    from ami2py.ami_arrays import DATE_KEY_MASK, VALUE_COLUMNS
+    from ami2py.consts import HOUR
+
+    db_path = tmp_path / "PandasEod"
+    shutil.copytree(os.path.join(test_data_folder, "TestData"), db_path)
+    db = AmiDataBase(db_path)
+    frame = db.to_pandas("SPCE")
+    db.from_pandas("SPCE2", frame)
+    db.write_database()
+
+    db = AmiDataBase(db_path)
+    original = db.get_symbol_array("SPCE")
+    copied = db.get_symbol_array("SPCE2")
+    assert len(copied) == len(original) == 600
+    mask = np.uint64(DATE_KEY_MASK)
+    assert np.array_equal(copied["DatePacked"] & mask, original["DatePacked"] & mask)
+    for name in VALUE_COLUMNS:
+        assert np.array_equal(copied[name], original[name])
+    assert db.get_fast_symbol_data("SPCE2")[0][HOUR] == 31
+    assert db.to_pandas("SPCE2").equals(frame)
+
+
+@pytest.mark.parametrize("partition_by", [None, "year"])
+def test_database_export_parquet(index_db, tmp_path, partition_by):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from ami2py import AmiDataBase
+
+    symbols = ["^GDAXI", "@ES_C", "~~~EQUITY"]
+    db = AmiDataBase(index_db)
+    db.export_parquet(
+        tmp_path / "export", symbols, chunk_size=1000, partition_by=partition_by,
+        workers=2,
+    )
+    if partition_by == "year":
+        assert (tmp_path / "export" / "year=2000").is_dir()
+    table = pq.read_table(tmp_path / "export").to_pandas()
+    for symbol in symbols:
+        rows = table[table["Symbol"] == symbol]
+        data = db.get_dict_for_symbol(symbol)
+        assert len(rows) == len(data["Close"])
+        assert rows["Close"].tolist() == data["Close"]
+        assert rows["Volume"].tolist() == data["Volume"]
+        assert rows["Date"].dt.year.tolist() == data["Year"]
+        assert rows["Date"].dt.month.tolist() == data["Month"]
+        assert rows["Date"].dt.day.tolist() == data["Day"]
+
+
+def test_database_iter_record_batches_bounded_chunks(index_db):
+    pytest.importorskip("pyarrow")
+    from ami2py import AmiDataBase
+
+    batches = list(AmiDataBase(index_db).iter_record_batches(["^GDAXI"], chunk_size=1000))
+    assert [batch.num_rows for batch in batches] == [1000, 1000, 1000, 542]
+    assert batches[0].schema.names[:2] == ["Symbol", "Date"]
+
+
+def test_iter_record_batches_converts_one_batch_ahead(index_db):
+    pytest.importorskip("pyarrow")
+    import threading
+    import time
+    from ami2py import AmiReader
+    from ami2py.ami_arrow import iter_record_batches
+
+    reader = AmiReader(index_db)
+    records = reader.get_symbol_array("^GDAXI")[:10]
+    lock = threading.Lock()
+    produced = []
+
+    class ChunkReader:
+        def iter_chunks(self, symbol, chunk_size, kind):
+            for _ in range(100):
+                with lock:
+                    produced.append(symbol)
+                yield records
+
+    batches = iter_record_batches(ChunkReader(), ["A", "B", "C"], 10, workers=2)
+    assert next(batches).num_rows == 10
+    time.sleep(0.3)
+    # the batch in the consumer, one queued and one converted per worker
+    assert len(produced) <= 1 + 2 * 2
+    batches.close()
+    assert len(produced) < 300
+
+
+def test_database_panel(tmp_path):
+    import datetime
+    from ami2py import AmiDataBase
+
+    def quotes(days, closes, hour=0):
+        return {"Year": [2030] * len(days), "Month": [1] * len(days), "Day": days,
+                "Hour": [hour] * len(days), "Open": closes, "High": closes,
+                "Low": closes, "Close": closes, "Volume": [1.0] * len(days)}
+
+    db = AmiDataBase(tmp_path)
+    db.append_columns("A", **quotes([2, 3, 5, 6], [1.0, 2.0, 3.0, 4.0]))
+    db.append_columns("B", **quotes([1, 3, 3, 6], [10.0, 20.0, 21.0, 40.0]))
+    db.append_to_symbol("B", {"Year": 2030, "Month": 1, "Day": 7, "Reserved": 3,
+                              "Close": 50.0, "Open": 0.0, "High": 0.0, "Low": 0.0})
+
+    panel = db.panel(["A", "B"])
+    assert panel.symbols == ["A", "B"]
+    assert panel.values.dtype == np.float32
+    assert [d.day for d in panel.dates.astype(datetime.datetime)] == [1, 2, 3, 5, 6, 7]
+    nan = np.nan
+    np.testing.assert_array_equal(
+        panel.values,
+        [[nan, 10], [1, nan], [2, 21], [3, nan], [4, 40], [nan, 50]],
+    )
+    filled = db.panel(["A", "B"], fill="ffill")
+    np.testing.assert_array_equal(
+        filled.values,
+        [[nan, 10], [1, 10], [2, 21], [3, 21], [4, 40], [4, 50]],
+    )
+    common = db.panel(["A", "B"], how="intersect")
+    np.testing.assert_array_equal(common.values, [[2, 21], [4, 40]])
+    window = db.panel(
+        ["A", "B"], start=datetime.date(2030, 1, 3), end=datetime.date(2030, 1, 5)
+    )
+    np.testing.assert_array_equal(window.values, [[2, 21], [3, nan]])
+    assert db.panel([]).values.shape == (0, 0)
+
+
+def test_database_panel_matches_dict_api(index_db):
+    import datetime
+    from ami2py import AmiDataBase
+
+    db = AmiDataBase(index_db)
+    panel = db.panel(["^GDAXI", "@ES_C"], how="intersect")
+    for column, symbol in enumerate(panel.symbols):
+        data = db.get_dict_for_symbol(symbol)
+        close = {
+            datetime.date(y, m, d): c
+            for y, m, d, c in zip(data["Year"], data["Month"], data["Day"], data["Close"])
+        }
+        dates = panel.dates.astype(datetime.datetime)
+        for date, value in zip(dates, panel.values[:, column]):
+            assert close[date.date()] == value
+
+
+def test_resample_records_intraday():
+    import datetime
+    from ami2py.ami_arrays import encode_columns, resample_records, decode_dates
+    from ami2py.ami_arrays import QUOTE_DTYPE
+
+    columns = {"Year": [2030] * 6, "Month": [1] * 6, "Day": [2] * 6,
+               "Hour": [9] * 6, "Minute": [0, 1, 4, 5, 9, 3],
+               "Open": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+               "High": [1.5, 2.5, 3.5, 4.5, 5.5, 9.0],
+               "Low": [0.5, 1.5, 2.5, 3.5, 4.5, 0.1],
+               "Close": [1.2, 2.2, 3.2, 4.2, 5.2, 6.2],
+               "Volume": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0]}
+    records = np.frombuffer(encode_columns(columns), dtype=QUOTE_DTYPE)
+
+    bars = resample_records(records, "5min")
+    assert decode_dates(bars["DatePacked"]).tolist() == [
+        datetime.datetime(2030, 1, 2, 9, 0), datetime.datetime(2030, 1, 2, 9, 5)
+    ]
+    # the unsorted 09:03 quote belongs to the first bar
+    np.testing.assert_array_equal(bars["Open"], np.float32([1.0, 4.0]))
+    np.testing.assert_array_equal(bars["High"], np.float32([9.0, 5.5]))
+    np.testing.assert_array_equal(bars["Low"], np.float32([0.1, 3.5]))
+    np.testing.assert_array_equal(bars["Close"], np.float32([3.2, 5.2]))
+    np.testing.assert_array_equal(bars["Volume"], [120.0, 90.0])
+    assert len(resample_records(records, "1h")) == 1
+    assert len(resample_records(records[:0], "D")) == 0
+    with pytest.raises(ValueError):
+        resample_records(records, "2W")
+    with pytest.raises(ValueError):
+        resample_records(records, "5s")
+
+
+def test_database_resample_matches_dict_api(index_db, tmp_path):
+    import datetime
+    import shutil
+    from ami2py import AmiDataBase
+
+    db_folder = tmp_path / "db"
+    shutil.copytree(index_db, db_folder)
+    db = AmiDataBase(db_folder)
+    data = db.get_dict_for_symbol("^GDAXI")
+    months = {}
+    for row in zip(data["Year"], data["Month"], data["Day"], data["Open"],
+                   data["High"], data["Low"], data["Close"], data["Volume"]):
+        months.setdefault(row[:2], []).append(row)
+
+    bars = db.resample("^GDAXI", "M")
+    assert len(bars) == len(months)
+    for bar, rows in zip(bars, months.values()):
+        assert bar["Open"] == rows[0][3]
+        assert bar["High"] == max(row[4] for row in rows)
+        assert bar["Low"] == min(row[5] for row in rows)
+        assert bar["Close"] == rows[-1][6]
+        assert bar["Volume"] == np.float32(sum(np.float64(row[7]) for row in rows))
+
+    weeks = db.resample("^GDAXI", "W", write_to="GDAXI_W")
+    recent = db.resample("^GDAXI", "W", start=datetime.date(2010, 1, 1))
+    assert 0 < len(recent) < len(weeks)
+    db.write_database()
+    written = AmiDataBase(db_folder).get_dict_for_symbol("GDAXI_W")
+    assert written["Close"] == weeks["Close"].tolist()
+    days = [datetime.date(y, m, d) for y, m, d in
+            zip(written["Year"], written["Month"], written["Day"])]
+    assert len({day.isocalendar()[:2] for day in days}) == len(days)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_database_intraday_dict(tmp_path, columnar):
+    import datetime
+    from ami2py import AmiDataBase
+
+    columns = {"Year": [2030, 2030], "Month": [1, 1], "Day": [2, 2],
+               "Hour": [9, 17], "Minute": [30, 59], "Second": [15, 0],
+               "MilliSec": [250, 0], "MicroSec": [7, 0],
+               "Open": [1.0, 2.0], "High": [1.0, 2.0], "Low": [1.0, 2.0],
+               "Close": [1.0, 2.0], "Volume": [5.0, 6.0]}
+    db = AmiDataBase(tmp_path)
+    db.add_symbol("ES")
+    db.append_columns("ES", **columns)
+    db.write_database()
+    db = AmiDataBase(tmp_path, columnar=columnar)
+
+    plain = db.get_dict_for_symbol("ES")
+    assert "Hour" not in plain
+    data = db.get_dict_for_symbol("ES", intraday=True)
+    for name, values in columns.items():
+        assert data[name] == values
+    assert db.reader.get_symbol_data_dictionary("ES", intraday=True) == data
+    epoch = db.get_dict_for_symbol("ES", intraday="epoch")
+    assert "Hour" not in epoch
+    start = datetime.datetime(1970, 1, 1)
+    assert [start + datetime.timedelta(microseconds=value)
+            for value in epoch["EpochMicroSec"]] == [
+        datetime.datetime(2030, 1, 2, 9, 30, 15, 250007),
+        datetime.datetime(2030, 1, 2, 17, 59),
+    ]
+    assert db.reader.get_symbol_data_dictionary("MISSING", intraday=True) == {}
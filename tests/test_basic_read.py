@@ -1,6 +1,9 @@
+import pytest
 from ami2py import AmiReader
 from ami2py.ami_construct import Master, SymbolConstruct,SymbolHeader
-from ami2py.consts import DATEPACKED, OPEN
+from ami2py.ami_dataclasses import MasterData, SymbolData, ColumnarSymbolData
+from ami2py.ami_records import parse_symbol
+from ami2py.consts import DATEPACKED, OPEN, MASTER_CONST
 import time
 import os
 from ami2py.ami_symbol_facade import AmiSymbolDataFacade
@@ -95,6 +98,50 @@ def test_write_master(master_data):
     assert newparsed["Symbols"][0]["Symbol"] == "JD"
 
 
+def build_master(symbols):
+    return Master.build(
+        {
+            "Header": b"BROKMAS2",
+            "NumSymbols": len(symbols),
+            "Symbols": [
+                {"Symbol": symbol, "Rest": bytes([index]) * 664}
+                for index, symbol in enumerate(symbols)
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "tail",
+    [
+        b"",
+        b"\0" * 100,
+        b"X" * 1172,
+        b"B" + b"\0" * 491 + b"\1" * 16 + b"\0" * 664,
+        b"\xff" + b"\0" * 491 + MASTER_CONST + b"\0" * 664,
+    ],
+)
+def test_master_set_by_binary_matches_construct(tail):
+    binary = build_master(["A", "AA", "^GDAXI", "X" * 491]) + tail
+    fast = MasterData().set_by_binary(binary)
+    assert fast == MasterData().set_by_construct(Master.parse(binary))
+    assert fast.get_symbols() == ["A", "AA", "^GDAXI", "X" * 491]
+    assert Master.build(fast.to_construct_dict()) == binary[: 12 + 4 * 1172]
+    assert fast.to_binary() == binary[: 12 + 4 * 1172]
+
+
+def test_master_append_symbol_skips_duplicates():
+    master = MasterData().set_by_binary(build_master(["A", "AA"]))
+    assert master.index_of("AA") == 1
+    assert "B" not in master
+    assert master.append_symbol("B")
+    assert not master.append_symbol("AA")
+    assert master.get_symbols() == ["A", "AA", "B"]
+    assert master.index_of("B") == 2
+    assert master.NumSymbols == 3
+    assert master.to_binary() == Master.build(master.to_construct_dict())
+
+
 def test_read_symbol_construct(symbol_spce):
     space = SymbolConstruct.parse(symbol_spce)
     assert space["Entries"][0][DATEPACKED]["Year"] == 2017
@@ -111,6 +158,82 @@ def test_write_symbol_construct(symbol_spce):
     assert newparsed["Entries"][0][OPEN] == -25
 
 
+def intraday_symbol_binary():
+    entries = [
+        {
+            DATEPACKED: {
+                "Isfut": index % 2,
+                "Reserved": index % 32,
+                "MicroSec": 7 * index,
+                "MilliSec": 999 - index,
+                "Second": index % 60,
+                "Minute": 59 - index % 60,
+                "Hour": index % 24,
+                "Day": 1 + index % 28,
+                "Month": 1 + index % 12,
+                "Year": 1990 + index,
+            },
+            "Close": 1.5 * index,
+            "Open": -2.25,
+            "High": 3.0e9,
+            "Low": 0.1,
+            "Volume": 1000.0 + index,
+            "AUX1": 0.5,
+            "AUX2": -0.5,
+            "TERMINATOR": 0.0,
+        }
+        for index in range(40)
+    ]
+    return SymbolConstruct.build({"Header": b"H" * 0x4A0, "Entries": entries})
+
+
+@pytest.mark.parametrize("tail", [b"", b"\0" * 4, b"\1" * 39])
+def test_symbol_data_set_by_binary_matches_construct(tail):
+    binary = intraday_symbol_binary() + tail
+    parsed = SymbolConstruct.parse(binary)
+    fast = SymbolData().set_by_binary(binary)
+    assert fast == SymbolData().set_by_construct(parsed)
+    assert fast.Entries[33].Reserved == 1 and fast.Entries[33].Future == 1
+    assert parse_symbol(binary) == parsed
+
+
+def test_record_encoders_match_construct_build():
+    binary = intraday_symbol_binary()
+    symbdata = SymbolData().set_by_binary(binary)
+    assert symbdata.to_binary() == binary
+    assert ColumnarSymbolData().set_by_binary(binary).to_binary() == binary
+
+    rows = [
+        {
+            "Year": el.Year, "Month": el.Month, "Day": el.Day, "Hour": el.Hour,
+            "Minute": el.Minute, "Second": el.Second, "MilliSec": el.Milli_sec,
+            "MicroSec": el.Micro_second, "Reserved": el.Reserved,
+            "Isfut": el.Future, "Close": el.Close, "Open": el.Open,
+            "High": el.High, "Low": el.Low, "Volume": el.Volume,
+            "AUX1": el.Aux_1, "AUX2": el.Aux_2,
+        }
+        for el in symbdata.Entries
+    ]
+    facade = AmiSymbolDataFacade()
+    for row in rows[:2]:
+        facade += row
+    facade.extend(rows[2:])
+    assert bytes(facade.binentries[:-4]) == binary[0x4A0:]
+
+
+def test_AmiReader_struct_decoder_matches_construct(index_db):
+    fast_reader = AmiReader(index_db)
+    construct_reader = AmiReader(index_db, use_construct=True)
+    for symbol in ["^GDAXI", "@ES_C"]:
+        fast = fast_reader.get_symbol_data(symbol)
+        assert fast == construct_reader.get_symbol_data(symbol)
+        assert fast.Entries[0].Hour == 31
+        assert fast_reader.get_symbol_data_dictionary(
+            symbol
+        ) == construct_reader.get_symbol_data_dictionary(symbol)
+    assert fast_reader.get_symbol_data_dictionary("MISSING") == {}
+
+
 def test_AmiReader():
     test_data_folder = os.path.dirname(__file__)
     test_data_folder = os.path.join(test_data_folder, "./TestData")
@@ -124,6 +247,37 @@ def test_AmiReader():
     assert spce["Day"][0] == 29
 
 
+def test_AmiReader_loads_master_lazily_once(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from ami2py import AmiDataBase
+
+    db = AmiDataBase(tmp_path)
+    for symbol in ("A", "B", "C"):
+        db.add_symbol(symbol)
+    db.write_database()
+
+    calls = []
+    read_master = AmiReader._read_master
+
+    def counting_read_master(self):
+        calls.append(1)
+        time.sleep(0.01)
+        return read_master(self)
+
+    monkeypatch.setattr(AmiReader, "_read_master", counting_read_master)
+    amireader = AmiReader(tmp_path)
+    assert calls == []
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: amireader.get_symbols(), range(8)))
+    assert calls == [1]
+    assert all(symbols == ["A", "B", "C"] for symbols in results)
+
+    db = AmiDataBase(tmp_path)
+    assert len(calls) == 1
+    assert db.get_symbols() == ["A", "B", "C"]
+    assert len(calls) == 2
+
+
 def test_reader_SymbolData():
     test_data_folder = os.path.dirname(__file__)
     test_data_folder = os.path.join(test_data_folder, "./TestData")
@@ -156,3 +310,106 @@ def test_reader_SymbolData():
 #     time_fast=time_fast/num_runs
 #
 #     assert time_slow > time_fast
+
+
+def test_extend_amisymbolfacade_matches_iadd(symbol_spce):
+    rows = [
+        {"Day": d, "Month": 3, "Year": 2020, "Hour": 9, "Minute": d,
+         "Close": 1.5 + d, "Open": 1.0, "High": 2.0 + d, "Low": 0.5, "Volume": 100.0 * d}
+        for d in range(1, 11)
+    ]
+    one_by_one = AmiSymbolDataFacade(symbol_spce)
+    for row in rows:
+        one_by_one += row
+    bulk = AmiSymbolDataFacade(symbol_spce)
+    bulk.extend(rows)
+    columns = AmiSymbolDataFacade(symbol_spce)
+    columns.extend({key: [row[key] for row in rows] for key in rows[0]})
+
+    assert bulk.length == columns.length == 610
+    assert bulk.binary == one_by_one.binary
+    assert columns.binary == one_by_one.binary
+    assert AmiSymbolDataFacade(bulk.binary).header["Length"] == 610
+    assert bulk[-1]["Minute"] == 10
+
+
+def test_extend_empty_amisymbolfacade():
+    facade = AmiSymbolDataFacade()
+    facade.extend({"Day": [1, 2], "Month": [1, 1], "Year": [2021, 2021],
+                   "Close": [1.0, 2.0], "Open": [1.0, 2.0],
+                   "High": [1.0, 2.0], "Low": [1.0, 2.0]})
+    assert facade.length == 2
+    assert facade[1]["Day"] == 2
+    assert len(facade.binary) == 0x4A0 + 2 * 40 + 4
+
+
+def test_get_range_amisymbolfacade(symbol_spce):
+    import datetime
+
+    facade = AmiSymbolDataFacade(symbol_spce)
+    expected = [
+        row for row in facade
+        if datetime.date(2019, 1, 1) <= datetime.date(row["Year"], row["Month"], row["Day"])
+        <= datetime.date(2019, 3, 31)
+    ]
+    result = facade.get_range(datetime.date(2019, 1, 1), datetime.date(2019, 3, 31))
+    assert len(result) > 0
+    assert result == expected
+    assert facade.get_range() == list(facade)
+    assert facade.get_range(datetime.date(2030, 1, 1)) == []
+    assert facade.get_range(end=datetime.date(2017, 9, 29)) == [facade[0]]
+    assert facade.at(datetime.date(2020, 2, 19)) == facade[-1]
+    with pytest.raises(KeyError):
+        facade.at(datetime.date(2020, 2, 16))
+
+
+def test_get_range_intraday_amisymbolfacade():
+    import datetime
+
+    facade = AmiSymbolDataFacade()
+    facade.extend(
+        [
+            {"Day": 3, "Month": 5, "Year": 2021, "Hour": 9, "Minute": minute,
+             "Close": float(minute), "Open": 1.0, "High": 1.0, "Low": 1.0}
+            for minute in range(0, 60, 5)
+        ]
+    )
+    result = facade.get_range(
+        datetime.datetime(2021, 5, 3, 9, 10), datetime.datetime(2021, 5, 3, 9, 20)
+    )
+    assert [row["Minute"] for row in result] == [10, 15, 20]
+    assert facade.at(datetime.datetime(2021, 5, 3, 9, 25))["Close"] == 25.0
+    assert len(facade.get_range(datetime.date(2021, 5, 3), datetime.date(2021, 5, 3))) == 12
+    assert facade.dates_sorted()
+    # appending an earlier quote turns off the binary search
+    facade.extend({"Day": 3, "Month": 5, "Year": 2021, "Hour": 9, "Minute": 12,
+                   "Close": 12.0, "Open": 1.0, "High": 1.0, "Low": 1.0})
+    assert not facade.dates_sorted()
+    result = facade.get_range(
+        datetime.datetime(2021, 5, 3, 9, 10), datetime.datetime(2021, 5, 3, 9, 20)
+    )
+    assert [row["Minute"] for row in result] == [10, 15, 20, 12]
+
+
+def test_readonly_amisymbolfacade(index_db):
+    from ami2py.errors import ReadOnlyFacadeError
+
+    reader = AmiReader(index_db)
+    copied = reader.get_fast_symbol_data("^GDAXI")
+    mapped = reader.get_fast_symbol_data("^GDAXI", readonly=True)
+    assert mapped.readonly and not copied.readonly
+    assert mapped.length == copied.length == 3542
+    assert mapped[-1] == copied[-1]
+    assert mapped[10:20] == copied[10:20]
+    assert list(mapped) == list(copied)
+    assert mapped.header["Length"] == 3542
+    with open(os.path.join(index_db, "_", "^GDAXI"), "rb") as f:
+        assert bytes(mapped.binary) == f.read()
+
+    with pytest.raises(ReadOnlyFacadeError):
+        mapped += copied[0]
+    writable = mapped.to_writable()
+    writable += copied[0]
+    assert writable.length == 3543
+    mapped.close()
+    assert len(mapped) == 0
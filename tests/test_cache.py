@@ -0,0 +1,44 @@
+from ami2py.ami_cache import SymbolCache
+
+
+class Sized:
+    def __init__(self, nbytes, modified=False):
+        self.nbytes = nbytes
+        self.modified = modified
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SymbolCache(max_bytes=250)
+    cache["A"] = Sized(100)
+    cache["B"] = Sized(100)
+    assert cache["A"].nbytes == 100
+    cache["C"] = Sized(100)
+    assert list(cache) == ["A", "C"]
+    assert cache.nbytes == 200
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_keeps_pinned_and_modified_entries():
+    cache = SymbolCache(max_bytes=150)
+    cache["A"] = Sized(100)
+    cache.pin("A")
+    cache["B"] = Sized(100, modified=True)
+    cache["C"] = Sized(100)
+    assert sorted(cache) == ["A", "B", "C"]
+
+    cache.unpin("A")
+    assert list(cache) == ["B"]
+    cache["B"].modified = False
+    cache["D"] = Sized(100)
+    assert list(cache) == ["D"]
+
+
+def test_cache_counts_hits_and_misses():
+    cache = SymbolCache()
+    cache["A"] = Sized(10)
+    assert cache.get("A") is not None
+    assert cache.get("B") is None
+    assert "A" in cache
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["max_bytes"] is None
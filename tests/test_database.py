@@ -287,6 +287,17 @@ def test_add_symbol_data_dict_new_symbol_fast():
     assert fast.length == 2
 
 
+def test_add_symbol_data_dict_empty_data_fast():
+    test_database_folder = os.path.join(test_data_folder, "./TestData")
+    db = AmiDataBase(test_database_folder)
+    original_len = db.get_fast_symbol_data("SPCE").length
+    db.add_symbol_data_dict({"SPCE": {}, "AAPL": {"Close": [], "Day": []}})
+    fast = db.get_fast_symbol_data("SPCE")
+    assert fast.length == original_len
+    assert not fast.modified
+    assert db.get_fast_symbol_data("AAPL").length == 0
+
+
 def test_AmiDataBase_should_create_new_db():
     # Setup folders
     test_database_folder = os.path.join(test_data_folder, "./NewData")
@@ -532,3 +543,380 @@ def test_AmiDataBase_can_read_at_symbol(index_db):
     assert equity["Day"][0] == 29
     assert equity["Month"][0] == 8
     assert equity["Year"][0] == 2003
+
+
+def test_AmiDataBase_get_symbol_array_includes_cached_appends():
+    pytest.importorskip("numpy")
+    test_database_folder = os.path.join(test_data_folder, "./TestData")
+    db = AmiDataBase(test_database_folder)
+    assert len(db.get_symbol_array("SPCE")) == 600
+    db.append_to_symbol(
+        "SPCE",
+        {
+            "Day": 20,
+            "Month": 2,
+            "Year": 2020,
+            "Close": 38.0,
+            "Open": 37.0,
+            "High": 39.0,
+            "Low": 36.5,
+            "Volume": 1000.0,
+        },
+    )
+    records = db.get_symbol_array("SPCE")
+    assert len(records) == 601
+    assert records["Close"][-1] == 38.0
+
+
+def test_write_database_writes_only_modified_symbols(tmp_path):
+    db_path = tmp_path / "Dirty"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path)
+    db.add_symbol("^GDAXI")
+    db.add_symbol("@ES_C")
+    db.write_database()
+
+    gdaxi_path = os.path.join(db_path, "_", "^GDAXI")
+    es_path = os.path.join(db_path, "_", "@ES_C")
+    master_path = os.path.join(db_path, "broker.master")
+    for path in (gdaxi_path, es_path, master_path):
+        os.utime(path, ns=(0, 0))
+
+    db = AmiDataBase(db_path)
+    db.get_dict_for_symbol("^GDAXI")
+    db.get_fast_symbol_data("^GDAXI")
+    db.append_to_symbol(
+        "@ES_C",
+        {"Day": 1, "Month": 1, "Year": 2030, "Close": 1.0, "Open": 1.0,
+         "High": 1.0, "Low": 1.0, "Volume": 1.0},
+    )
+    db.write_database()
+
+    assert os.stat(gdaxi_path).st_mtime_ns == 0
+    assert os.stat(master_path).st_mtime_ns == 0
+    assert os.stat(es_path).st_mtime_ns != 0
+    assert AmiDataBase(db_path).get_fast_symbol_data("@ES_C")[-1]["Year"] == 2030
+
+
+def test_write_database_writes_symbol_data_changed_directly(tmp_path):
+    db_path = tmp_path / "DirectData"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    gdaxi_path = os.path.join(db_path, "_", "^GDAXI")
+    es_path = os.path.join(db_path, "_", "@ES_C")
+    for path in (gdaxi_path, es_path):
+        os.utime(path, ns=(0, 0))
+    quote = SymbolEntry(Day=1, Month=1, Year=2030, Close=1.0, Open=1.0,
+                        High=1.0, Low=1.0, Volume=1.0)
+
+    db = AmiDataBase(db_path, cache_bytes=1)
+    gdaxi = db.get_symbol_data("^GDAXI")
+    length = len(gdaxi.Entries)
+    gdaxi.append(quote)
+    db.get_symbol_data("@ES_C")
+    db.write_database()
+    assert os.stat(es_path).st_mtime_ns == 0
+    assert os.stat(gdaxi_path).st_mtime_ns != 0
+
+    db = AmiDataBase(db_path)
+    gdaxi = db.get_symbol_data("^GDAXI")
+    assert len(gdaxi.Entries) == length + 1
+    assert gdaxi.Entries[-1].Year == 2030
+    gdaxi.Entries[-1].Close = 2.0
+    db.mark_symbol_modified("^GDAXI")
+    db.write_database()
+    assert AmiDataBase(db_path).get_symbol_data("^GDAXI").Entries[-1].Close == 2.0
+
+
+def test_write_database_append_mode_writes_only_new_records(tmp_path):
+    db_path = tmp_path / "Append"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    symbol_path = os.path.join(db_path, "_", "^GDAXI")
+    with open(symbol_path, "rb") as f:
+        original = f.read()
+
+    new_rows = [
+        {"Day": day, "Month": 1, "Year": 2030, "Close": 1.0 * day, "Open": 1.0,
+         "High": 2.0 * day, "Low": 0.5, "Volume": 10.0}
+        for day in (2, 3)
+    ]
+    db = AmiDataBase(db_path, write_mode="append")
+    db.append_to_symbol("^GDAXI", new_rows)
+    facade = db.get_fast_symbol_data("^GDAXI")
+    expected = original[: 0x4A0 - 4] + (3542 + 2).to_bytes(4, "little")
+    expected += bytes(facade.binentries)
+    db.write_database()
+
+    with open(symbol_path, "rb") as f:
+        written = f.read()
+    assert written == expected
+    assert written[0x4A0 : len(original) - 4] == original[0x4A0:-4]
+
+    db.append_to_symbol("^GDAXI", new_rows[0])
+    db.write_database()
+    check = AmiDataBase(db_path).get_fast_symbol_data("^GDAXI")
+    assert check.length == 3542 + 3
+    assert check.header["Length"] == 3542 + 3
+    assert check[-1]["Day"] == 2
+
+
+def test_write_database_append_mode_rewrites_changed_file(tmp_path):
+    db_path = tmp_path / "AppendChanged"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path, write_mode="append")
+    db.append_to_symbol(
+        "@ES_C",
+        {"Day": 1, "Month": 1, "Year": 2030, "Close": 1.0, "Open": 1.0,
+         "High": 1.0, "Low": 1.0, "Volume": 1.0},
+    )
+    symbol_path = os.path.join(db_path, "_", "@ES_C")
+    with open(symbol_path, "r+b") as f:
+        f.truncate(0x4A0 + 4)
+    db.write_database()
+    with open(symbol_path, "rb") as f:
+        assert f.read() == bytes(db.get_fast_symbol_data("@ES_C").binary)
+
+
+def test_AmiDataBase_get_range_and_at(index_db):
+    import datetime
+
+    db = AmiDataBase(index_db)
+    quotes = db.get_range("^GDAXI", datetime.date(2000, 1, 1), datetime.date(2000, 1, 31))
+    assert [q["Day"] for q in quotes][:3] == [3, 4, 5]
+    assert all(q["Month"] == 1 and q["Year"] == 2000 for q in quotes)
+    assert db.at("^GDAXI", datetime.date(2000, 1, 3))["Close"] == 6750.759765625
+
+
+def test_AmiDataBase_get_range_of_unsorted_symbol(index_db):
+    import datetime
+
+    # @ES_C is not sorted, 2015-09-28 is followed by 2015-05-05
+    db = AmiDataBase(index_db)
+    facade = db.get_fast_symbol_data("@ES_C")
+    assert not facade.dates_sorted()
+    with pytest.raises(ValueError):
+        facade.index_range(datetime.date(2015, 6, 1))
+    data = db.get_dict_for_symbol("@ES_C")
+    for month, days in ((5, 31), (6, 30), (9, 30)):
+        expected = sum(
+            1 for y, m in zip(data["Year"], data["Month"]) if (y, m) == (2015, month)
+        )
+        quotes = db.get_range(
+            "@ES_C", datetime.date(2015, month, 1), datetime.date(2015, month, days)
+        )
+        assert len(quotes) == expected
+    june = db.get_range("@ES_C", datetime.date(2015, 6, 1), datetime.date(2015, 6, 30))
+    assert len(june) == 44
+    assert db.at("@ES_C", datetime.date(2015, 6, 1)) == june[0]
+    assert db.get_fast_symbol_data("^GDAXI").dates_sorted()
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_AmiDataBase_load_symbols(index_db, executor):
+    db = AmiDataBase(index_db)
+    symbols = ["^GDAXI", "@ES_C", "~~~EQUITY"]
+    loaded = db.load_symbols(symbols, workers=2, kind="dict", executor=executor)
+    assert list(loaded) == symbols
+    for symbol in symbols:
+        assert loaded[symbol] == AmiDataBase(index_db).get_dict_for_symbol(symbol)
+
+
+def test_AmiDataBase_load_symbols_from_generator(index_db):
+    db = AmiDataBase(index_db)
+    symbols = ["^GDAXI", "@ES_C"]
+    loaded = db.load_symbols((symbol for symbol in symbols), workers=2)
+    assert list(loaded) == symbols
+    assert loaded["@ES_C"] is db.get_fast_symbol_data("@ES_C")
+
+
+def test_AmiDataBase_load_symbols_as_completed_fills_cache(index_db):
+    db = AmiDataBase(index_db)
+    symbols = ["^GDAXI", "@ES_C", "~~~EQUITY"]
+    results = dict(db.load_symbols(symbols, workers=3, as_completed=True))
+    assert sorted(results) == sorted(symbols)
+    for symbol in symbols:
+        assert db.get_fast_symbol_data(symbol) is results[symbol]
+    assert results["^GDAXI"].length == 3542
+
+
+def test_AmiDataBase_cache_bytes_bounds_fast_cache(index_db):
+    db = AmiDataBase(index_db, cache_bytes=0x4A0 + 3542 * 40)
+    db.get_fast_symbol_data("^GDAXI")
+    db.get_fast_symbol_data("@ES_C")
+    db.get_fast_symbol_data("@ES_C")
+    info = db.cache_info()["fast"]
+    assert info["nbytes"] <= info["max_bytes"]
+    assert info["evictions"] == 1
+    assert (info["hits"], info["misses"]) == (1, 2)
+
+    db.append_to_symbol(
+        "@ES_C",
+        {"Day": 1, "Month": 1, "Year": 2030, "Close": 1.0, "Open": 1.0,
+         "High": 1.0, "Low": 1.0, "Volume": 1.0},
+    )
+    db.get_fast_symbol_data("^GDAXI")
+    assert db.get_fast_symbol_data("@ES_C")[-1]["Year"] == 2030
+
+
+def test_AmiDataBase_writes_facade_changed_after_eviction(tmp_path):
+    db_path = tmp_path / "Evicted"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path, cache_bytes=200_000)
+    facade = db.get_fast_symbol_data("^GDAXI")
+    length = facade.length
+    db.get_fast_symbol_data("@ES_C")
+    db.get_fast_symbol_data("~~~EQUITY")
+    assert db.cache_info()["fast"]["evictions"] >= 1
+    facade.extend({"Day": 1, "Month": 1, "Year": 2030, "Close": 1.0, "Open": 1.0,
+                   "High": 1.0, "Low": 1.0, "Volume": 1.0})
+    db.write_database()
+    assert AmiDataBase(db_path).get_fast_symbol_data("^GDAXI").length == length + 1
+    # a held facade is put back instead of being loaded again
+    assert db.get_fast_symbol_data("^GDAXI") is facade
+
+
+def test_AmiDataBase_columnar_symbol_data(tmp_path):
+    db_path = tmp_path / "Columnar"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path, columnar=True)
+    data = db.get_symbol_data("^GDAXI")
+    assert type(data).__name__ == "ColumnarSymbolData"
+    assert data.to_dict() == AmiDataBase(db_path).get_dict_for_symbol("^GDAXI")
+
+    db.append_symbol_data(
+        {"NEW": {"Day": [1, 2], "Month": [3, 3], "Year": [2030, 2030],
+                 "Open": [1.0, 2.0], "High": [1.0, 2.0], "Low": [1.0, 2.0],
+                 "Close": [1.0, 2.0], "Volume": [5.0, 6.0]}}
+    )
+    db.write_database()
+    new = AmiDataBase(db_path).get_dict_for_symbol("NEW")
+    assert new["Day"] == [1, 2]
+    assert new["Close"] == [1.0, 2.0]
+
+
+def test_AmiDataBase_readonly_facades(tmp_path):
+    db_path = tmp_path / "ReadOnly"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path, readonly_facades=True, write_mode="append")
+    assert db.get_fast_symbol_data("^GDAXI").readonly
+    db.append_to_symbol(
+        "^GDAXI",
+        {"Day": 1, "Month": 1, "Year": 2030, "Close": 1.0, "Open": 1.0,
+         "High": 1.0, "Low": 1.0, "Volume": 1.0},
+    )
+    facade = db.get_fast_symbol_data("^GDAXI")
+    assert not facade.readonly and facade.length == 3543
+    db.write_database()
+    assert AmiDataBase(db_path).get_fast_symbol_data("^GDAXI")[-1]["Year"] == 2030
+
+
+def test_AmiDataBase_closes_replaced_readonly_facades(tmp_path):
+    db_path = tmp_path / "ReadOnlyClosed"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path, readonly_facades=True)
+    quote = {"Day": 1, "Month": 1, "Year": 2030, "Close": 1.0, "Open": 1.0,
+             "High": 1.0, "Low": 1.0, "Volume": 1.0}
+
+    mapped = db.get_fast_symbol_data("^GDAXI")
+    db.append_to_symbol("^GDAXI", quote)
+    assert mapped._mmap is None
+    assert db.get_fast_symbol_data("^GDAXI").length == 3543
+
+    mapped = db.get_fast_symbol_data("@ES_C")
+    db.append_symbole_entry("@ES_C", SymbolEntry(**quote))
+    db.write_database()
+    assert mapped._mmap is None
+    facade = db.get_fast_symbol_data("@ES_C")
+    assert facade is not mapped and facade.readonly
+
+
+def test_AmiDataBase_get_last_bars_and_timestamp(tmp_path):
+    import datetime
+
+    db_path = tmp_path / "Tail"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path)
+    full = AmiDataBase(db_path).get_fast_symbol_data("^GDAXI")
+    assert db.get_last_bars("^GDAXI", 3) == full[full.length - 3 : full.length]
+    assert db.get_last_bars("^GDAXI", 10**6) == list(full)
+    last = full[-1]
+    assert db.get_last_timestamp("^GDAXI") == datetime.datetime(
+        last["Year"], last["Month"], last["Day"]
+    )
+    assert "^GDAXI" not in db._fast_symbol_cache
+    assert db.get_last_timestamp("MISSING") is None
+    assert db.get_last_bars("MISSING", 2) == []
+
+    db.append_to_symbol(
+        "^GDAXI",
+        {"Day": 1, "Month": 1, "Year": 2030, "Hour": 9, "Minute": 30,
+         "Close": 1.0, "Open": 1.0, "High": 1.0, "Low": 1.0, "Volume": 1.0},
+    )
+    db.append_symbol_entry(
+        "@ES_C",
+        SymbolEntry(Close=2.0, High=2.0, Low=2.0, Open=2.0, Volume=1.0,
+                    Day=2, Month=1, Year=2030),
+    )
+    assert db.get_last_timestamps(["^GDAXI", "@ES_C"]) == {
+        "^GDAXI": datetime.datetime(2030, 1, 1, 9, 30),
+        "@ES_C": datetime.datetime(2030, 1, 2),
+    }
+    assert db.get_last_bars("@ES_C")[0]["Close"] == 2.0
+
+
+def test_AmiDataBase_get_last_bars_of_unwritten_symbol_data(tmp_path):
+    db = AmiDataBase(tmp_path)
+    for day in (1, 2, 3):
+        db.append_symbol_entry(
+            "X",
+            SymbolEntry(Close=float(day), High=1.0, Low=1.0, Open=1.0, Volume=1.0,
+                        Day=day, Month=1, Year=2030),
+        )
+    assert "X" not in db._fast_symbol_cache
+    assert [bar["Close"] for bar in db.get_last_bars("X", 5)] == [1.0, 2.0, 3.0]
+    assert [bar["Close"] for bar in db.get_last_bars("X", 2)] == [2.0, 3.0]
+    assert db.get_last_bars("X", 0) == []
+
+
+def test_AmiDataBase_catalog(tmp_path):
+    import datetime
+    from ami2py.ami_catalog import CATALOG_FILE
+
+    db_path = tmp_path / "Catalog"
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    db = AmiDataBase(db_path, catalog=True)
+    db.add_symbol("^GDAXI")
+    db.add_symbol("@ES_C")
+    db.write_database()
+    db.update_catalog()
+    assert os.path.isfile(os.path.join(db_path, CATALOG_FILE))
+    plain = AmiDataBase(db_path)
+    expected_last = plain.get_last_timestamp("^GDAXI")
+
+    db = AmiDataBase(db_path, catalog=True)
+    assert db.catalog.get_symbols() == plain.get_symbols()
+    entry = db.get_catalog(["^GDAXI"])["^GDAXI"]
+    assert entry["bars"] == 3542
+    assert entry["last"] == expected_last
+    assert entry["header"]["Length"] == 3542
+    assert not db.catalog.modified
+
+    db.append_to_symbol(
+        "^GDAXI",
+        {"Day": 1, "Month": 1, "Year": 2030, "Close": 1.0, "Open": 1.0,
+         "High": 1.0, "Low": 1.0, "Volume": 1.0},
+    )
+    assert db.get_last_timestamp("^GDAXI") == datetime.datetime(2030, 1, 1)
+    db.add_symbol("NEW")
+    db.write_database()
+    db = AmiDataBase(db_path, catalog=True)
+    assert db.catalog.get_symbols()[-1] == "NEW"
+    assert db.catalog.entry("^GDAXI")["bars"] == 3543
+
+    # files changed behind the back of the catalog are read again
+    other = AmiDataBase(db_path)
+    other.append_to_symbol("@ES_C", {
+        "Day": 2, "Month": 1, "Year": 2030, "Close": 1.0, "Open": 1.0,
+        "High": 1.0, "Low": 1.0, "Volume": 1.0,
+    })
+    other.write_database()
+    assert db.get_last_timestamp("@ES_C") == datetime.datetime(2030, 1, 2)
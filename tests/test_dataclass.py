@@ -1,4 +1,5 @@
 from ami2py import SymbolEntry, SymbolData, Master, MasterData, MasterEntry
+from ami2py import ColumnarSymbolData
 from dataclass_type_validator import TypeValidationError
 from ami2py.ami_construct import SymbolConstruct
 from ami2py import DATEPACKED, OPEN
@@ -84,4 +85,33 @@ def test_SymbolData(symbol_spce):
     assert newparsed["Entries"][0][OPEN] == 10.5
 
 
+def test_ColumnarSymbolData(symbol_spce):
+    symbdata = SymbolData().set_by_binary(symbol_spce)
+    columnar = ColumnarSymbolData().set_by_binary(symbol_spce)
+    assert len(columnar) == len(symbdata.Entries) == 600
+    assert columnar.nbytes == 0x4A0 + 600 * 40
+    assert columnar.to_dict() == symbdata.to_dict()
+    assert columnar.to_construct_dict() == symbdata.to_construct_dict()
+    assert columnar.Entries[-1] == symbdata.Entries[-1]
+    assert columnar.Entries[1:3] == symbdata.Entries[1:3]
+    assert columnar.to_binary() == SymbolConstruct.build(symbdata.to_construct_dict())
 
+    entry = SymbolEntry(
+        Close=10.5,
+        Low=10.0,
+        High=12.0,
+        Open=10.0,
+        Volume=100.0,
+        Day=10,
+        Month=11,
+        Year=2020,
+        Hour=9,
+        Minute=30,
+        Reserved=3,
+        Future=1,
+    )
+    columnar.append(entry)
+    columnar.Entries.append(entry)
+    assert len(columnar.Entries) == 602
+    assert columnar.Entries[-1] == entry
+    assert ColumnarSymbolData(Entries=[entry]).Entries[0] == entry
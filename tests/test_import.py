@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# the import of ami2py may take this many times as long as the import of the
+# standard library modules below, the fastest of a few runs is compared
+IMPORT_BUDGET_FACTOR = 4
+BASELINE_MODULES = ("dataclasses", "pathlib")
+IMPORT_RUNS = 3
+
+CHECK_MODULES = """
+import sys
+import ami2py
+from ami2py import AmiDataBase, SymbolData
+print(sorted(m for m in sys.modules if m.split('.')[0] in
+      ('construct', 'dataclass_type_validator', 'numpy')))
+"""
+
+
+def _run_python(*args):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, AMI2PY_USE_RUST="0")
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, env=env, check=True
+    )
+
+
+def test_import_does_not_load_optional_modules():
+    assert _run_python("-c", CHECK_MODULES).stdout.strip() == "[]"
+
+
+def _import_time_us(*modules):
+    """Cumulative import time of ``modules`` in a new interpreter."""
+    code = "import " + ", ".join(modules)
+    total = 0
+    for line in _run_python("-X", "importtime", "-c", code).stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() in modules:
+            total += int(parts[1])
+    return total
+
+
+@pytest.mark.skipif(
+    bool(os.environ.get("AMI2PY_SKIP_IMPORT_BUDGET")),
+    reason="AMI2PY_SKIP_IMPORT_BUDGET is set",
+)
+def test_import_time_budget():
+    baseline = min(_import_time_us(*BASELINE_MODULES) for _ in range(IMPORT_RUNS))
+    ami2py = min(_import_time_us("ami2py") for _ in range(IMPORT_RUNS))
+    assert ami2py < IMPORT_BUDGET_FACTOR * baseline
+
+
+def test_lazy_construct_attributes():
+    import ami2py
+    from ami2py.ami_construct import Master, SymbolConstruct
+
+    assert ami2py.Master is Master
+    assert ami2py.SymbolConstruct is SymbolConstruct
+    assert callable(ami2py.create_entry_chunk)
@@ -0,0 +1,114 @@
+import os
+import shutil
+
+import pytest
+
+import ami2py.ami_journal as ami_journal
+from ami2py import AmiDataBase
+from ami2py.ami_journal import AmiWriteBatch, recover_journal, JOURNAL_FILE
+from ami2py.errors import JournalError
+
+test_data_folder = os.path.dirname(__file__)
+
+NEW_QUOTE = {
+    "Day": 1,
+    "Month": 1,
+    "Year": 2030,
+    "Close": 1.0,
+    "Open": 1.0,
+    "High": 1.0,
+    "Low": 1.0,
+    "Volume": 1.0,
+}
+
+
+def copy_db(tmp_path, name):
+    db_path = tmp_path / name
+    shutil.copytree(os.path.join(test_data_folder, "TestDB"), db_path)
+    return db_path
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_atomic_write_database_matches_plain_write(tmp_path):
+    results = []
+    for atomic in (False, True):
+        db_path = copy_db(tmp_path, f"Atomic{atomic}")
+        db = AmiDataBase(db_path, atomic_writes=atomic)
+        db.add_new_symbol("NEW", NEW_QUOTE)
+        db.append_to_symbol("^GDAXI", NEW_QUOTE)
+        db.write_database()
+        assert not any(
+            name.startswith("ami2py.journal") for name in os.listdir(db_path)
+        )
+        results.append(
+            [read(os.path.join(db_path, *p)) for p in (["n", "NEW"], ["_", "^GDAXI"])]
+        )
+    assert results[0] == results[1]
+
+
+def test_interrupted_batch_is_rolled_back(tmp_path):
+    db_path = copy_db(tmp_path, "RollBack")
+    symbol_path = os.path.join(db_path, "_", "^GDAXI")
+    original = read(symbol_path)
+
+    batch = AmiWriteBatch(db_path, atomic=True)
+    batch.replace(symbol_path, b"garbage")
+    # the lock is released when the writing process dies
+    batch.close()
+
+    assert recover_journal(db_path) == "rolled_back"
+    assert read(symbol_path) == original
+    assert not os.path.exists(symbol_path + ami_journal.TEMP_SUFFIX)
+
+
+def test_committed_batch_is_rolled_forward(tmp_path, monkeypatch):
+    db_path = copy_db(tmp_path, "RollForward")
+    db = AmiDataBase(db_path, write_mode="append", atomic_writes=True)
+    db.append_to_symbol("^GDAXI", NEW_QUOTE)
+    db.add_new_symbol("NEW", NEW_QUOTE)
+    expected_length = db.get_fast_symbol_data("^GDAXI").length
+
+    monkeypatch.setattr(ami_journal, "_recover", lambda folder: None)
+    db.write_database()
+    monkeypatch.undo()
+    assert os.path.isfile(os.path.join(db_path, JOURNAL_FILE))
+
+    reopened = AmiDataBase(db_path)
+    assert not os.path.isfile(os.path.join(db_path, JOURNAL_FILE))
+    gdaxi = reopened.get_fast_symbol_data("^GDAXI")
+    assert gdaxi.length == expected_length
+    assert gdaxi[-1]["Year"] == 2030
+    assert reopened.get_fast_symbol_data("NEW").length == 1
+
+
+def test_open_does_not_recover_a_batch_in_progress(tmp_path):
+    db_path = copy_db(tmp_path, "InProgress")
+    symbol_path = os.path.join(db_path, "_", "^GDAXI")
+    original = read(symbol_path)
+
+    batch = AmiWriteBatch(db_path, atomic=True)
+    batch.replace(symbol_path, original + b"\0" * 40)
+    assert recover_journal(db_path) is None
+    AmiDataBase(db_path)
+    assert os.path.isfile(symbol_path + ami_journal.TEMP_SUFFIX)
+    batch.commit()
+    assert read(symbol_path) == original + b"\0" * 40
+
+
+def test_commit_fails_if_a_temp_file_is_missing(tmp_path):
+    db_path = copy_db(tmp_path, "MissingTemp")
+    symbol_path = os.path.join(db_path, "_", "^GDAXI")
+    original = read(symbol_path)
+
+    with AmiWriteBatch(db_path, atomic=True) as batch:
+        batch.replace(symbol_path, b"garbage")
+        os.remove(symbol_path + ami_journal.TEMP_SUFFIX)
+        with pytest.raises(JournalError):
+            batch.commit()
+    assert not os.path.isfile(os.path.join(db_path, JOURNAL_FILE))
+    assert recover_journal(db_path) is None
+    assert read(symbol_path) == original